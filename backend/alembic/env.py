@@ -1,4 +1,5 @@
 import asyncio
+import re
 from logging.config import fileConfig
 
 from sqlalchemy import pool
@@ -11,6 +12,7 @@ from alembic import context
 from app.core.database import Base
 from app.auth.models import User, OAuthAccount  # noqa: F401
 from app.media.models import Media  # noqa: F401
+from app.core.rate_limit import RateLimitBucket  # noqa: F401
 
 # Import settings
 from app.core.settings import settings
@@ -31,6 +33,16 @@ config.set_main_option("sqlalchemy.url", str(settings.database_url))
 # for 'autogenerate' support
 target_metadata = Base.metadata
 
+# Partitions of the hash-partitioned media table, created by the migration
+# rather than the models
+MEDIA_PARTITION = re.compile(r"media_p\d{2}")
+
+
+def include_name(name, type_, parent_names) -> bool:
+    """Keep the media partitions out of autogenerate, which would drop them."""
+    return not (type_ == "table" and MEDIA_PARTITION.fullmatch(name))
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -53,6 +65,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -62,7 +75,11 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
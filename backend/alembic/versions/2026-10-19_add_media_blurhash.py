@@ -0,0 +1,29 @@
+"""Add media blurhash placeholder
+
+Revision ID: 64d8b1f0a9c5
+Revises: 9f41c7a2e8d3
+Create Date: 2026-10-19 23:02:37.145920
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "64d8b1f0a9c5"
+down_revision: Union[str, Sequence[str], None] = "9f41c7a2e8d3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("media", sa.Column("blurhash", sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("media", "blurhash")
@@ -0,0 +1,73 @@
+"""Add media_change log for delta sync
+
+Revision ID: a81d6e0c5b92
+Revises: 3f2a9c41d7e5
+Create Date: 2026-10-19 14:03:27.540912
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import fastapi_users_db_sqlalchemy
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a81d6e0c5b92"
+down_revision: Union[str, Sequence[str], None] = "3f2a9c41d7e5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "media_change",
+        sa.Column(
+            "user_id", fastapi_users_db_sqlalchemy.generics.GUID(), nullable=False
+        ),
+        sa.Column("media_id", sa.UUID(), nullable=False),
+        sa.Column("seq", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "op",
+            sa.Enum("CREATED", "UPDATED", "DELETED", name="media_change_op"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["user.id"],
+            name=op.f("media_change_user_id_fkey"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("user_id", "media_id", name=op.f("media_change_pkey")),
+    )
+    op.create_index(
+        "media_change_user_id_seq_idx",
+        "media_change",
+        ["user_id", "seq", "media_id"],
+        unique=False,
+    )
+
+    # Existing media become creations at the user's current library version
+    op.execute(
+        """
+        INSERT INTO media_library (user_id, version)
+        SELECT DISTINCT user_id, 1 FROM media
+        ON CONFLICT (user_id) DO NOTHING
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO media_change (user_id, media_id, seq, op)
+        SELECT m.user_id, m.id, l.version, 'CREATED'
+        FROM media m JOIN media_library l ON l.user_id = m.user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("media_change_user_id_seq_idx", table_name="media_change")
+    op.drop_table("media_change")
+    sa.Enum(name="media_change_op").drop(op.get_bind(), checkfirst=True)
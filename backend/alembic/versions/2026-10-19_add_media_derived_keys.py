@@ -0,0 +1,35 @@
+"""Add media poster and HLS playlist keys
+
+Revision ID: 2e6a0d9c4b17
+Revises: 7b3c5f0e1a68
+Create Date: 2026-10-19 21:08:42.517903
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2e6a0d9c4b17"
+down_revision: Union[str, Sequence[str], None] = "7b3c5f0e1a68"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "media", sa.Column("poster_key", sa.String(length=500), nullable=True)
+    )
+    op.add_column(
+        "media", sa.Column("playlist_key", sa.String(length=500), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("media", "playlist_key")
+    op.drop_column("media", "poster_key")
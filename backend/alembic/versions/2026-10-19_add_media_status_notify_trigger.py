@@ -0,0 +1,54 @@
+"""Add media status NOTIFY trigger
+
+Revision ID: 5c07b3e9f2a4
+Revises: a81d6e0c5b92
+Create Date: 2026-10-19 16:47:09.381655
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5c07b3e9f2a4"
+down_revision: Union[str, Sequence[str], None] = "a81d6e0c5b92"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        CREATE FUNCTION notify_media_status() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify(
+                'media_status',
+                json_build_object(
+                    'user_id', NEW.user_id,
+                    'media_id', NEW.id,
+                    'status', lower(NEW.status::text)
+                )::text
+            );
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER media_status_notify
+        AFTER UPDATE OF status ON media
+        FOR EACH ROW
+        WHEN (OLD.status IS DISTINCT FROM NEW.status)
+        EXECUTE FUNCTION notify_media_status()
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER media_status_notify ON media")
+    op.execute("DROP FUNCTION notify_media_status()")
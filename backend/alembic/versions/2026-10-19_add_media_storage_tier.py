@@ -0,0 +1,51 @@
+"""Add media storage tier and last access time
+
+Revision ID: a3e7c9154b2d
+Revises: 64d8b1f0a9c5
+Create Date: 2026-10-19 23:41:08.512304
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a3e7c9154b2d"
+down_revision: Union[str, Sequence[str], None] = "64d8b1f0a9c5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+storage_tier = sa.Enum(
+    "STANDARD",
+    "STANDARD_IA",
+    "GLACIER_IR",
+    "GLACIER",
+    "DEEP_ARCHIVE",
+    name="media_storage_tier",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    storage_tier.create(op.get_bind(), checkfirst=True)
+    # A constant default doesn't rewrite the table
+    op.add_column(
+        "media",
+        sa.Column(
+            "storage_tier", storage_tier, server_default="STANDARD", nullable=False
+        ),
+    )
+    op.add_column(
+        "media",
+        sa.Column("last_accessed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("media", "last_accessed_at")
+    op.drop_column("media", "storage_tier")
+    storage_tier.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,29 @@
+"""Add media web derivative key
+
+Revision ID: 9f41c7a2e8d3
+Revises: 2e6a0d9c4b17
+Create Date: 2026-10-19 22:14:03.861254
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9f41c7a2e8d3"
+down_revision: Union[str, Sequence[str], None] = "2e6a0d9c4b17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("media", sa.Column("web_key", sa.String(length=500), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("media", "web_key")
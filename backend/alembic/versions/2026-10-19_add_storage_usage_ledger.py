@@ -0,0 +1,73 @@
+"""Add storage usage ledger and widen media file_size
+
+Revision ID: d94e17b2c6f8
+Revises: 5c07b3e9f2a4
+Create Date: 2026-10-19 18:21:55.902316
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d94e17b2c6f8"
+down_revision: Union[str, Sequence[str], None] = "5c07b3e9f2a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+USAGE_COLUMNS = ("image_count", "image_bytes", "video_count", "video_bytes")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column(
+        "media",
+        "file_size",
+        existing_type=sa.Integer(),
+        type_=sa.BigInteger(),
+        existing_nullable=False,
+    )
+    for column in USAGE_COLUMNS:
+        op.add_column(
+            "media_library",
+            sa.Column(
+                column, sa.BigInteger(), server_default=sa.text("0"), nullable=False
+            ),
+        )
+
+    op.execute(
+        """
+        INSERT INTO media_library (
+            user_id, image_count, image_bytes, video_count, video_bytes
+        )
+        SELECT
+            user_id,
+            count(*) FILTER (WHERE media_type = 'IMAGE'),
+            coalesce(sum(file_size) FILTER (WHERE media_type = 'IMAGE'), 0),
+            count(*) FILTER (WHERE media_type = 'VIDEO'),
+            coalesce(sum(file_size) FILTER (WHERE media_type = 'VIDEO'), 0)
+        FROM media
+        GROUP BY user_id
+        ON CONFLICT (user_id) DO UPDATE SET
+            image_count = excluded.image_count,
+            image_bytes = excluded.image_bytes,
+            video_count = excluded.video_count,
+            video_bytes = excluded.video_bytes
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in reversed(USAGE_COLUMNS):
+        op.drop_column("media_library", column)
+    op.alter_column(
+        "media",
+        "file_size",
+        existing_type=sa.BigInteger(),
+        type_=sa.Integer(),
+        existing_nullable=False,
+    )
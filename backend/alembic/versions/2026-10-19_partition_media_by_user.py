@@ -0,0 +1,104 @@
+"""Partition media by user and index per user
+
+Revision ID: c5f2e8a61d94
+Revises: a3e7c9154b2d
+Create Date: 2026-10-19 23:58:21.730415
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c5f2e8a61d94"
+down_revision: Union[str, Sequence[str], None] = "a3e7c9154b2d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Fixed for the lifetime of the table; changing it means repartitioning
+MEDIA_PARTITIONS = 16
+
+STATUS_TRIGGER = """
+    CREATE TRIGGER media_status_notify
+    AFTER UPDATE OF status ON media
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status)
+    EXECUTE FUNCTION notify_media_status()
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rows are copied inside the migration's transaction, which blocks writes
+    # to media until it commits
+    op.execute("ALTER TABLE media RENAME TO media_unpartitioned")
+    op.execute("ALTER INDEX media_pkey RENAME TO media_unpartitioned_pkey")
+
+    op.execute(
+        "CREATE TABLE media (LIKE media_unpartitioned INCLUDING DEFAULTS) "
+        "PARTITION BY HASH (user_id)"
+    )
+    for remainder in range(MEDIA_PARTITIONS):
+        op.execute(
+            f"CREATE TABLE media_p{remainder:02d} PARTITION OF media "
+            f"FOR VALUES WITH (MODULUS {MEDIA_PARTITIONS}, REMAINDER {remainder})"
+        )
+    # Load before indexing, building indexes once is faster
+    op.execute("INSERT INTO media SELECT * FROM media_unpartitioned")
+
+    # Unique constraints on a partitioned table must include the partition key
+    op.create_primary_key("media_pkey", "media", ["id", "user_id"])
+    op.create_unique_constraint(
+        "media_user_id_s3_key_key", "media", ["user_id", "s3_key"]
+    )
+    op.create_foreign_key(
+        "media_user_id_fkey", "media", "user", ["user_id"], ["id"], ondelete="CASCADE"
+    )
+    op.create_index(
+        "media_user_id_created_at_idx",
+        "media",
+        ["user_id", sa.text("created_at DESC")],
+    )
+    for column in ("media_type", "status", "is_favorite"):
+        op.create_index(
+            f"media_user_id_{column}_created_at_idx",
+            "media",
+            ["user_id", column, sa.text("created_at DESC")],
+        )
+    op.create_index(
+        "media_unfinished_created_at_idx",
+        "media",
+        ["created_at"],
+        postgresql_where=sa.text("status IN ('PENDING', 'PROCESSING')"),
+    )
+
+    # Drops the old table's trigger; row triggers on the partitioned table
+    # are cloned to every partition
+    op.execute("DROP TABLE media_unpartitioned")
+    op.execute(STATUS_TRIGGER)
+    op.execute("ANALYZE media")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE media RENAME TO media_partitioned")
+    op.execute("ALTER INDEX media_pkey RENAME TO media_partitioned_pkey")
+
+    op.execute("CREATE TABLE media (LIKE media_partitioned INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO media SELECT * FROM media_partitioned")
+
+    op.create_primary_key("media_pkey", "media", ["id"])
+    op.create_unique_constraint("media_s3_key_key", "media", ["s3_key"])
+    op.create_foreign_key(
+        "media_user_id_fkey", "media", "user", ["user_id"], ["id"], ondelete="CASCADE"
+    )
+    op.create_index("media_media_type_idx", "media", ["media_type"], unique=False)
+    op.create_index("media_status_idx", "media", ["status"], unique=False)
+    op.create_index("media_user_id_idx", "media", ["user_id"], unique=False)
+
+    # Drops the partitions and their indexes and triggers too
+    op.execute("DROP TABLE media_partitioned")
+    op.execute(STATUS_TRIGGER)
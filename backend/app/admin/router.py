@@ -0,0 +1,42 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.dependencies import current_superuser
+from app.auth.models import User
+from app.core.database import get_async_session
+from app.core.profiling import profiler, render_collapsed
+from app.core.query_budget import query_budget
+from app.core.settings import settings
+
+router = APIRouter()
+
+
+@router.post("/profile", response_class=PlainTextResponse)
+@query_budget(2)
+async def capture_profile(
+    seconds: float = Query(10, gt=0, le=settings.profiling_max_seconds),
+    interval_ms: float = Query(10, ge=1, le=1000),
+    mode: Literal["wall", "cpu"] = "wall",
+    path_prefix: str | None = Query(
+        None, description="Only sample while requests under this path run"
+    ),
+    header: str | None = Query(
+        None, description="Only sample while requests with this header run"
+    ),
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_superuser),
+):
+    """Sample this worker's stacks and return them in collapsed format."""
+    # Don't hold a database connection for the whole capture
+    await session.close()
+
+    stacks = await profiler.capture(
+        seconds, interval_ms / 1000, mode, path_prefix, header
+    )
+    return PlainTextResponse(
+        render_collapsed(stacks),
+        headers={"X-Profile-Samples": str(stacks.total())},
+    )
@@ -0,0 +1,10 @@
+class AuthError(Exception):
+    """Base exception for auth."""
+
+
+class PasswordHashingBusy(AuthError):
+    """Too many password hashing jobs are in flight."""
+
+    def __init__(self, retry_after: int = 1):
+        self.retry_after = retry_after
+        super().__init__("Too many concurrent login attempts, try again shortly")
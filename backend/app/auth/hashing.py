@@ -0,0 +1,66 @@
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.metrics import registry
+from app.core.settings import settings
+from .exceptions import PasswordHashingBusy
+
+password_hash_rejected = registry.counter(
+    "auth_password_hash_rejected_total",
+    "Password hashing jobs rejected because the pool was saturated.",
+)
+
+
+class PasswordHashingPool:
+    """Bounded thread pool for CPU-heavy password hashing.
+
+    argon2 and bcrypt release the GIL while hashing, so threads keep the
+    event loop responsive. Jobs beyond `max_pending` are rejected instead of
+    queueing indefinitely.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: ThreadPoolExecutor | None = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Lazy initialization of the executor."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="password-hash"
+            )
+        return self._executor
+
+    async def run[T](self, func: Callable[..., T], *args) -> T:
+        """Run `func` in the pool, raising PasswordHashingBusy when saturated."""
+        if self.pending >= self.max_pending:
+            password_hash_rejected.inc()
+            raise PasswordHashingBusy()
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hashing_pool = PasswordHashingPool(
+    max_workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+)
+
+registry.gauge(
+    "auth_password_hash_pending",
+    "Password hashing jobs running or waiting in the pool.",
+    callback=lambda: password_hashing_pool.pending,
+)
@@ -1,3 +1,4 @@
+import asyncio
 import secrets
 from fastapi import APIRouter, Depends, Query
 from fastapi.responses import RedirectResponse
@@ -8,6 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from .models import User, OAuthAccount
 from .schemas import UserRead, UserCreate, UserUpdate
 from .dependencies import fastapi_users
+from .hashing import password_hashing_pool
 from .services import (
     auth_backend,
     fetch_google_profile,
@@ -15,6 +17,7 @@ from .services import (
     google_oauth_client,
 )
 
+from app.core.query_budget import query_budget
 from app.core.settings import settings
 from app.core.database import get_async_session
 
@@ -58,6 +61,7 @@ router.include_router(
 
 
 @router.get("/google/callback/redirect")
+@query_budget(8)
 async def google_callback_redirect(
     code: str = Query(...),
     state: str | None = Query(None),
@@ -76,11 +80,11 @@ async def google_callback_redirect(
     )
     google_access_token = access_token_response["access_token"]
 
-    # Fetch Google user
-    google_id, email = await google_oauth_client.get_id_email(google_access_token)
-
-    # Fetch Google profile
-    google_profile = await fetch_google_profile(google_access_token)
+    # Fetch Google user and profile concurrently
+    (google_id, email), google_profile = await asyncio.gather(
+        google_oauth_client.get_id_email(google_access_token),
+        fetch_google_profile(google_access_token),
+    )
     avatar_url = google_profile.get("picture", None)
 
     if not email:
@@ -122,7 +126,9 @@ async def google_callback_redirect(
 
         else:
             password_helper = PasswordHelper()
-            random_hash = password_helper.hash(secrets.token_urlsafe(32))
+            random_hash = await password_hashing_pool.run(
+                password_helper.hash, secrets.token_urlsafe(32)
+            )
             user = User(
                 email=email,
                 hashed_password=random_hash,
@@ -1,3 +1,5 @@
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
 from typing import Optional
 
 from fastapi.security import HTTPBearer
@@ -5,20 +7,19 @@ from fastapi import Depends, Request, status
 from fastapi.exceptions import HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi_users import BaseUserManager, UUIDIDMixin
-from fastapi_users.authentication import (
-    AuthenticationBackend,
-    BearerTransport,
-    JWTStrategy,
-)
+from fastapi_users.authentication import AuthenticationBackend, BearerTransport
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
 from fastapi_users import exceptions
 from fastapi_users import models
 from httpx_oauth.clients.google import GoogleOAuth2
 import httpx
 
+from app.core.http import http_client
 from app.core.settings import settings
 from app.core.database import get_user_db
+from .hashing import password_hashing_pool
 from .models import User
+from .strategy import CachedJWTStrategy
 
 SECRET = settings.jwt_secret.get_secret_value()
 
@@ -40,13 +41,17 @@ class UserManager(UUIDIDMixin, BaseUserManager):
         except exceptions.UserNotExists:
             # Run the hasher to mitigate timing attack
             # Inspired from Django: https://code.djangoproject.com/ticket/20760
-            self.password_helper.hash(credentials.password)
+            await password_hashing_pool.run(
+                self.password_helper.hash, credentials.password
+            )
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="LOGIN_BAD_CREDENTIALS"
             )
 
-        verified, updated_password_hash = self.password_helper.verify_and_update(
-            credentials.password, user.hashed_password
+        verified, updated_password_hash = await password_hashing_pool.run(
+            self.password_helper.verify_and_update,
+            credentials.password,
+            user.hashed_password,
         )
         if not verified or not user.has_password:
             raise HTTPException(
@@ -112,18 +117,31 @@ class SimpleBearerTransport(BearerTransport):
 bearer_transport = SimpleBearerTransport()
 
 
-def get_jwt_strategy() -> JWTStrategy:
-    return JWTStrategy(
-        secret=SECRET,
-        lifetime_seconds=settings.jwt_lifetime_seconds,
-    )
+jwt_strategy = CachedJWTStrategy(
+    secret=SECRET,
+    lifetime_seconds=settings.jwt_lifetime_seconds,
+    cache_size=settings.jwt_cache_size,
+)
+
+
+def get_jwt_strategy() -> CachedJWTStrategy:
+    return jwt_strategy
 
 
 auth_backend = AuthenticationBackend(
     name="jwt", transport=bearer_transport, get_strategy=get_jwt_strategy
 )
 
-google_oauth_client = GoogleOAuth2(
+
+class SharedClientGoogleOAuth2(GoogleOAuth2):
+    """Google OAuth client that reuses the pooled application HTTP client."""
+
+    @asynccontextmanager
+    async def get_httpx_client(self) -> AsyncGenerator[httpx.AsyncClient, None]:
+        yield http_client.client
+
+
+google_oauth_client = SharedClientGoogleOAuth2(
     client_id=settings.google_client_id.get_secret_value(),
     client_secret=settings.google_client_secret.get_secret_value(),
     scopes=[
@@ -135,10 +153,9 @@ google_oauth_client = GoogleOAuth2(
 
 
 async def fetch_google_profile(access_token: str) -> dict:
-    async with httpx.AsyncClient() as client:
-        res = await client.get(
-            "https://www.googleapis.com/oauth2/v3/userinfo",
-            headers={"Authorization": f"Bearer {access_token}"},
-        )
-        res.raise_for_status()
-        return res.json()
+    res = await http_client.client.get(
+        settings.google_userinfo_url,
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+    res.raise_for_status()
+    return res.json()
@@ -0,0 +1,112 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import jwt
+from fastapi_users import BaseUserManager, exceptions, models
+from fastapi_users.authentication import JWTStrategy
+from fastapi_users.jwt import decode_jwt
+
+from app.core.metrics import registry
+
+token_cache_requests = registry.counter(
+    "auth_token_cache_requests_total",
+    "JWT claim cache lookups by result.",
+    ["result"],
+)
+token_cache_evictions = registry.counter(
+    "auth_token_cache_evictions_total",
+    "JWT claims evicted from the cache because it was full.",
+)
+
+
+class TokenCache:
+    """Bounded LRU of verified JWT subjects, keyed by the raw token."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, token: str) -> Optional[str]:
+        """Return the cached subject, or None if missing or expired."""
+        entry = self._entries.get(token)
+        if entry is None:
+            token_cache_requests.inc(result="miss")
+            return None
+
+        subject, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[token]
+            token_cache_requests.inc(result="expired")
+            return None
+
+        self._entries.move_to_end(token)
+        token_cache_requests.inc(result="hit")
+        return subject
+
+    def set(self, token: str, subject: str, expires_at: float) -> None:
+        """Cache a verified subject until the token's `exp`."""
+        if self.maxsize <= 0:
+            return
+
+        self._entries[token] = (subject, expires_at)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            token_cache_evictions.inc()
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class CachedJWTStrategy(JWTStrategy):
+    """JWT strategy that skips signature verification for recently seen tokens.
+
+    Only the token subject is cached; the user is still loaded on every
+    request so deactivation and verification changes apply immediately.
+    """
+
+    def __init__(self, *args, cache_size: int = 10_000, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache = TokenCache(cache_size)
+
+    def _decode_subject(self, token: str) -> Optional[str]:
+        subject = self.cache.get(token)
+        if subject is not None:
+            return subject
+
+        try:
+            data = decode_jwt(
+                token, self.decode_key, self.token_audience, algorithms=[self.algorithm]
+            )
+        except jwt.PyJWTError:
+            return None
+
+        subject = data.get("sub")
+        if subject is None:
+            return None
+
+        # Tokens without `exp` never expire, so they are not worth the risk
+        expires_at = data.get("exp")
+        if expires_at is not None:
+            self.cache.set(token, subject, float(expires_at))
+        return subject
+
+    async def read_token(
+        self, token: Optional[str], user_manager: BaseUserManager[models.UP, models.ID]
+    ) -> Optional[models.UP]:
+        if token is None:
+            return None
+
+        subject = self._decode_subject(token)
+        if subject is None:
+            return None
+
+        try:
+            parsed_id = user_manager.parse_id(subject)
+            return await user_manager.get(parsed_id)
+        except (exceptions.UserNotExists, exceptions.InvalidID):
+            return None
@@ -0,0 +1,193 @@
+"""CloudFront signed URLs and cookies, signed locally with an RSA key.
+
+See https://docs.aws.amazon.com/AmazonCloudFront/latest/DeveloperGuide/
+PrivateContent.html. To check signed URLs offline against a test key pair:
+
+    openssl genrsa -out private.pem 2048
+    openssl rsa -in private.pem -pubout -out public.pem
+    python -m app.core.aws.cloudfront "<signed url>" public.pem
+"""
+
+import base64
+import json
+import math
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from app.core.settings import settings
+
+# Query parameters of a canned-policy signed URL
+SIGNING_PARAMS = ("Expires", "Signature", "Key-Pair-Id")
+
+
+def _b64encode(data: bytes) -> str:
+    """Base64 with the characters CloudFront substitutes for URL safety."""
+    encoded = base64.b64encode(data).decode()
+    return encoded.replace("+", "-").replace("=", "_").replace("/", "~")
+
+
+def _b64decode(value: str) -> bytes:
+    value = value.replace("-", "+").replace("_", "=").replace("~", "/")
+    return base64.b64decode(value)
+
+
+def _policy(resource: str, expires: int) -> bytes:
+    statement = {
+        "Resource": resource,
+        "Condition": {"DateLessThan": {"AWS:EpochTime": expires}},
+    }
+    # Canned policies are signed exactly in this compact form
+    return json.dumps({"Statement": [statement]}, separators=(",", ":")).encode()
+
+
+class CloudFrontSigner:
+    """Signs CloudFront URLs and cookies, caching the key and signatures.
+
+    Expiry times are rounded up to `cdn_expiry_step_seconds`, so repeated
+    requests for the same resource reuse one signature, and clients and the
+    CDN see the same URL.
+    """
+
+    def __init__(self, max_cached: int = 100_000):
+        self.max_cached = max_cached
+        self._key = None
+        self._lock = threading.Lock()
+        self._signed: OrderedDict[tuple[str, int], str] = OrderedDict()
+
+    @property
+    def key(self):
+        """The private key, loaded on first use."""
+        if self._key is None:
+            with self._lock:
+                if self._key is None:
+                    self._key = self._load_key()
+        return self._key
+
+    def _load_key(self):
+        # Only needed for CDN delivery, so import it on first use
+        from cryptography.hazmat.primitives.serialization import load_pem_private_key
+
+        if settings.cdn_private_key is not None:
+            pem = settings.cdn_private_key.get_secret_value().encode()
+        elif settings.cdn_private_key_path is not None:
+            pem = settings.cdn_private_key_path.read_bytes()
+        else:
+            raise RuntimeError("CDN_PRIVATE_KEY or CDN_PRIVATE_KEY_PATH is required")
+        return load_pem_private_key(pem, password=None)
+
+    def expires(self, expires_in: int) -> int:
+        """Epoch expiry at least `expires_in` seconds away, rounded up."""
+        step = settings.cdn_expiry_step_seconds
+        return math.ceil((time.time() + expires_in) / step) * step
+
+    def sign(self, policy: bytes) -> str:
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import padding
+
+        signature = self.key.sign(policy, padding.PKCS1v15(), hashes.SHA1())
+        return _b64encode(signature)
+
+    def _cached_signature(self, resource: str, expires: int) -> str:
+        cache_key = (resource, expires)
+        with self._lock:
+            signature = self._signed.get(cache_key)
+            if signature is not None:
+                self._signed.move_to_end(cache_key)
+                return signature
+
+        signature = self.sign(_policy(resource, expires))
+        with self._lock:
+            self._signed[cache_key] = signature
+            if len(self._signed) > self.max_cached:
+                self._signed.popitem(last=False)
+        return signature
+
+    def signed_url(self, url: str, expires_in: int) -> str:
+        """Sign a URL with a canned policy, valid for this URL only."""
+        expires = self.expires(expires_in)
+        signature = self._cached_signature(url, expires)
+        params = urlencode(
+            {
+                "Expires": expires,
+                "Signature": signature,
+                "Key-Pair-Id": settings.cdn_key_pair_id,
+            }
+        )
+        return f"{url}{'&' if '?' in url else '?'}{params}"
+
+    def signed_cookies(self, resource: str, expires_in: int) -> tuple[dict, int]:
+        """Cookies granting access to every URL matching `resource`.
+
+        The resource may contain `*` wildcards, e.g. all files of one user.
+        Returns the cookies and their epoch expiry.
+        """
+        expires = self.expires(expires_in)
+        policy = _policy(resource, expires)
+        signature = self._cached_signature(resource, expires)
+        cookies = {
+            "CloudFront-Policy": _b64encode(policy),
+            "CloudFront-Signature": signature,
+            "CloudFront-Key-Pair-Id": settings.cdn_key_pair_id,
+        }
+        return cookies, expires
+
+
+def _verify(policy: bytes, signature: str, public_key_pem: bytes) -> bool:
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+    from cryptography.hazmat.primitives.serialization import load_pem_public_key
+
+    public_key = load_pem_public_key(public_key_pem)
+    try:
+        public_key.verify(
+            _b64decode(signature), policy, padding.PKCS1v15(), hashes.SHA1()
+        )
+    except InvalidSignature:
+        return False
+    return True
+
+
+def verify_signed_url(url: str, public_key_pem: bytes) -> bool:
+    """Check a canned-policy signed URL the way CloudFront does, offline."""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    signing = {name: value for name, value in query if name in SIGNING_PARAMS}
+    if set(signing) != set(SIGNING_PARAMS) or int(signing["Expires"]) < time.time():
+        return False
+
+    resource_query = urlencode(
+        [(name, value) for name, value in query if name not in SIGNING_PARAMS]
+    )
+    resource = parts._replace(query=resource_query).geturl()
+    policy = _policy(resource, int(signing["Expires"]))
+    return _verify(policy, signing["Signature"], public_key_pem)
+
+
+def verify_signed_cookies(
+    url: str, cookies: dict[str, str], public_key_pem: bytes
+) -> bool:
+    """Check that signed cookies grant access to a URL, offline."""
+    policy = _b64decode(cookies["CloudFront-Policy"])
+    statement = json.loads(policy)["Statement"][0]
+    expires = statement["Condition"]["DateLessThan"]["AWS:EpochTime"]
+    # CloudFront wildcards: * matches any characters, ? exactly one
+    pattern = re.escape(statement["Resource"]).replace(r"\*", ".*").replace(r"\?", ".")
+    if expires < time.time() or not re.fullmatch(pattern, url):
+        return False
+    return _verify(policy, cookies["CloudFront-Signature"], public_key_pem)
+
+
+cloudfront_signer = CloudFrontSigner()
+
+
+if __name__ == "__main__":
+    url, public_key_path = sys.argv[1:3]
+    with open(public_key_path, "rb") as f:
+        valid = verify_signed_url(url, f.read())
+    print("valid" if valid else "invalid")
+    sys.exit(0 if valid else 1)
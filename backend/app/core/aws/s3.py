@@ -1,45 +1,121 @@
+from collections.abc import Iterator
 from typing import Optional
+import functools
+import hashlib
+import threading
+import time
 import uuid
 from datetime import datetime
 
-import boto3
-from botocore.config import Config
 from botocore.exceptions import ClientError
 
+from app.core.metrics import registry
 from app.core.settings import settings
 
+s3_calls = registry.counter(
+    "s3_calls_total", "S3 calls by operation and outcome.", ["operation", "outcome"]
+)
+s3_call_duration = registry.histogram(
+    "s3_call_duration_seconds", "S3 call latency by operation.", ["operation"]
+)
+
+
+def instrumented(operation: str):
+    """Record count, outcome and latency of an S3Service method."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                result = func(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                s3_call_duration.observe(
+                    time.perf_counter() - start, operation=operation
+                )
+                s3_calls.inc(operation=operation, outcome=outcome)
+
+        return wrapper
+
+    return decorator
+
+
+def key_shard(unique_id: str) -> str:
+    """Hash prefix of an upload key, uniformly spread over the shards."""
+    digest = hashlib.blake2b(unique_id.encode(), digest_size=8).hexdigest()
+    return digest[: settings.s3_key_shard_chars]
+
 
 class S3Service:
     """Service for S3 operations."""
 
     def __init__(self):
-        self._client: boto3.client | None = None
+        self._client = None
+        self._lock = threading.Lock()
 
     @property
     def client(self):
         """Lazy initialization of the S3 client."""
         if self._client is None:
-            self._client = boto3.client(
-                "s3",
-                aws_access_key_id=settings.aws_access_key_id.get_secret_value(),
-                aws_secret_access_key=settings.aws_secret_access_key.get_secret_value(),
-                region_name=settings.aws_region,
-                endpoint_url=settings.s3_endpoint_url,
-                config=Config(signature_version="s3v4"),
-            )
+            with self._lock:
+                if self._client is None:
+                    self._client = self._create_client()
         return self._client
 
+    def _create_client(self):
+        # boto3 takes a large share of startup time, so import it on first use
+        import boto3
+        from botocore.config import Config
+
+        return boto3.client(
+            "s3",
+            aws_access_key_id=settings.aws_access_key_id.get_secret_value(),
+            aws_secret_access_key=settings.aws_secret_access_key.get_secret_value(),
+            region_name=settings.aws_region,
+            endpoint_url=settings.s3_endpoint_url,
+            config=Config(signature_version="s3v4"),
+        )
+
     def generate_upload_key(self, user_id: uuid.UUID, filename: str) -> str:
-        """Generate a unique S3 key for upload."""
+        """Generate a unique S3 key for upload.
+
+        Sharded keys look like `media/{shard}/{user_id}/{id}.{ext}`, where the
+        shard is a hash of the ID, so a user's batch upload spreads over many
+        prefixes instead of hitting one prefix's request rate limit.
+        """
         ext = filename.rsplit(".", 1)[-1] if "." in filename else ""
-        timestamp = datetime.utcnow().strftime("%Y/%m/%d")
-        unique_id = uuid.uuid4().hex[:8]
-        return f"media/{user_id}/{timestamp}/{unique_id}.{ext}"
+        unique_id = uuid.uuid4().hex
+        if settings.s3_key_scheme == "dated":
+            timestamp = datetime.utcnow().strftime("%Y/%m/%d")
+            return f"media/{user_id}/{timestamp}/{unique_id}.{ext}"
+        return f"media/{key_shard(unique_id)}/{user_id}/{unique_id}.{ext}"
+
+    def key_user_id(self, key: str) -> uuid.UUID | None:
+        """Owner of an upload key, under either key scheme."""
+        # media/{user_id}/{date}/... or media/{shard}/{user_id}/...
+        for part in key.split("/")[1:3]:
+            try:
+                return uuid.UUID(part)
+            except ValueError:
+                continue
+        return None
 
     def generate_thumbnail_key(self, original_key: str) -> str:
         """Generate thumbnail key from original key."""
         return original_key.replace("media/", "thumbnails/", 1)
 
+    def derived_prefix(self, original_key: str) -> str:
+        """Prefix for files derived from an original, e.g. HLS renditions.
+
+        Mirrors the original's key, so derived files are sharded alike.
+        """
+        stem = original_key.rsplit(".", 1)[0]
+        return stem.replace("media/", "derived/", 1)
+
+    @instrumented("presign_put_object")
     def create_presigned_upload_url(
         self, key: str, content_type: str, expires_in: int = 3600
     ) -> str:
@@ -57,6 +133,7 @@ class S3Service:
         except ClientError as e:
             raise RuntimeError(f"Failed to create presigned upload URL: {e}")
 
+    @instrumented("presign_get_object")
     def create_presigned_download_url(
         self, key: str, expires_in: int = 3600, filename: str | None = None
     ) -> str:
@@ -78,6 +155,70 @@ class S3Service:
         except ClientError as e:
             raise RuntimeError(f"Failed to create presigned download URL: {e}")
 
+    def list_pages(self, prefix: str, delimiter: str | None = None) -> Iterator[dict]:
+        """Stream ListObjectsV2 pages of up to 1000 keys under a prefix."""
+        params = {"Bucket": settings.s3_bucket_name, "Prefix": prefix}
+        if delimiter is not None:
+            params["Delimiter"] = delimiter
+        paginator = self.client.get_paginator("list_objects_v2")
+        yield from paginator.paginate(**params)
+
+    @instrumented("put_object")
+    def put_object(self, key: str, body: bytes, content_type: str) -> None:
+        """Upload a small object from memory."""
+        self.client.put_object(
+            Bucket=settings.s3_bucket_name, Key=key, Body=body, ContentType=content_type
+        )
+
+    @instrumented("upload_file")
+    def upload_file(self, path: str, key: str, content_type: str) -> None:
+        """Upload a local file, using multipart uploads for large files."""
+        self.client.upload_file(
+            path,
+            settings.s3_bucket_name,
+            key,
+            ExtraArgs={"ContentType": content_type},
+        )
+
+    @instrumented("download_file")
+    def download_file(self, key: str, path: str) -> None:
+        """Download an object to a local file."""
+        self.client.download_file(settings.s3_bucket_name, key, path)
+
+    @instrumented("copy_object")
+    def set_storage_class(self, key: str, storage_class: str) -> None:
+        """Move an object to another storage class by copying it onto itself."""
+        self.client.copy_object(
+            Bucket=settings.s3_bucket_name,
+            Key=key,
+            CopySource={"Bucket": settings.s3_bucket_name, "Key": key},
+            StorageClass=storage_class,
+            MetadataDirective="COPY",
+        )
+
+    @instrumented("restore_object")
+    def restore_object(self, key: str, days: int, tier: str) -> None:
+        """Start restoring a temporary readable copy of an archived object."""
+        try:
+            self.client.restore_object(
+                Bucket=settings.s3_bucket_name,
+                Key=key,
+                RestoreRequest={"Days": days, "GlacierJobParameters": {"Tier": tier}},
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "RestoreAlreadyInProgress":
+                raise
+
+    @instrumented("get_object")
+    def get_object(self, key: str) -> Optional[bytes]:
+        """Download a small object into memory."""
+        try:
+            response = self.client.get_object(Bucket=settings.s3_bucket_name, Key=key)
+            return response["Body"].read()
+        except ClientError:
+            return None
+
+    @instrumented("delete_object")
     def delete_object(self, key: str) -> bool:
         """Delete an object from S3."""
         try:
@@ -86,6 +227,7 @@ class S3Service:
         except ClientError:
             return False
 
+    @instrumented("delete_objects")
     def delete_objects(self, keys: list[str]) -> bool:
         """Delete multiple objects from S3."""
         if not keys:
@@ -100,6 +242,24 @@ class S3Service:
         except ClientError:
             return False
 
+    @instrumented("delete_prefix")
+    def delete_prefix(self, prefix: str) -> bool:
+        """Delete every object under a prefix."""
+        try:
+            paginator = self.client.get_paginator("list_objects_v2")
+            pages = paginator.paginate(Bucket=settings.s3_bucket_name, Prefix=prefix)
+            for page in pages:
+                keys = [item["Key"] for item in page.get("Contents", [])]
+                if keys:
+                    self.client.delete_objects(
+                        Bucket=settings.s3_bucket_name,
+                        Delete={"Objects": [{"Key": key} for key in keys]},
+                    )
+            return True
+        except ClientError:
+            return False
+
+    @instrumented("head_object")
     def head_object(self, key: str) -> Optional[dict]:
         """Get object metadata without downloading."""
         try:
@@ -109,6 +269,9 @@ class S3Service:
                 "content_length": response.get("ContentLength"),
                 "last_modified": response.get("LastModified"),
                 "etag": response.get("ETag"),
+                "storage_class": response.get("StorageClass", "STANDARD"),
+                # e.g. 'ongoing-request="false", expiry-date="..."' once restored
+                "restore": response.get("Restore"),
             }
         except ClientError:
             return None
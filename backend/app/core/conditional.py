@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi import Request, Response, status
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Responses are per user, so only the browser may cache them and it must
+# revalidate with If-None-Match before reuse
+CACHE_CONTROL = "private, no-cache"
+# Keeps accounts sharing a browser from revalidating each other's entries
+VARY = "Authorization"
+
+
+def weak_etag(value: str | int) -> str:
+    """Build a weak ETag header value."""
+    return f'W/"{value}"'
+
+
+def timestamp_etag(value: datetime) -> str:
+    """Build a weak ETag from a timestamp with microsecond precision."""
+    return weak_etag((value - EPOCH) // timedelta(microseconds=1))
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check If-None-Match against `etag` using weak comparison."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in header.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    """Build an empty 304 response for a matching ETag."""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": VARY},
+    )
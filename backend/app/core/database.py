@@ -1,12 +1,24 @@
+import math
+import time
+import uuid
 from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
 from datetime import datetime
 
-from fastapi import Depends
+from fastapi import Depends, Request, Response
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
 from sqlalchemy import MetaData, DateTime, func
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    create_async_engine,
+    async_sessionmaker,
+    AsyncSession,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+from app.core.metrics import registry
 from app.core.settings import settings
 
 POSTGRES_INDEXES_NAMING_CONVENTION = {
@@ -18,10 +30,86 @@ POSTGRES_INDEXES_NAMING_CONVENTION = {
 }
 metadata = MetaData(naming_convention=POSTGRES_INDEXES_NAMING_CONVENTION)
 
-engine = create_async_engine(
-    str(settings.database_url), echo=settings.debug, future=True
+pool_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool.",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+pool_checked_out = registry.gauge(
+    "db_pool_checked_out", "Connections currently checked out.", ["pool"]
+)
+pool_saturation = registry.gauge(
+    "db_pool_saturation",
+    "Checked out connections as a fraction of pool size plus overflow.",
+    ["pool"],
 )
 
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that reports checkout wait time and saturation."""
+
+    label = "primary"
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        pool = super().recreate()
+        pool.label = self.label
+        return pool
+
+    def _record_usage(self) -> None:
+        checked_out = self.checkedout()
+        pool_checked_out.set(checked_out, pool=self.label)
+        capacity = self.size() + self._max_overflow
+        if capacity > 0:
+            pool_saturation.set(checked_out / capacity, pool=self.label)
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_checkout_wait.observe(time.perf_counter() - start, pool=self.label)
+            self._record_usage()
+
+    def _do_return_conn(self, record) -> None:
+        super()._do_return_conn(record)
+        self._record_usage()
+
+
+def build_engine(url: str, label: str = "primary") -> AsyncEngine:
+    """Create an async engine with pool settings from configuration."""
+    if settings.database_pgbouncer_mode:
+        # PgBouncer in transaction mode cannot keep named prepared statements
+        # across transactions, so disable caching and use unique names.
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    else:
+        connect_args = {
+            "statement_cache_size": settings.database_statement_cache_size,
+            "prepared_statement_cache_size": settings.database_statement_cache_size,
+        }
+
+    engine = create_async_engine(
+        url,
+        echo=settings.database_echo,
+        future=True,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_timeout=settings.database_pool_timeout_seconds,
+        pool_recycle=settings.database_pool_recycle_seconds,
+        pool_pre_ping=settings.database_pool_pre_ping,
+        connect_args=connect_args,
+    )
+    engine.sync_engine.pool.label = label
+    return engine
+
+
+engine = build_engine(str(settings.database_url))
+
 async_session_maker = async_sessionmaker(
     engine,
     class_=AsyncSession,
@@ -30,6 +118,86 @@ async_session_maker = async_sessionmaker(
     autoflush=False,
 )
 
+replica_failovers = registry.counter(
+    "db_replica_failovers_total",
+    "Replica connection failures that were routed elsewhere.",
+    ["pool"],
+)
+
+
+class ReplicaRouter:
+    """Round-robin routing of read-only sessions across replicas.
+
+    Replicas that fail to hand out a connection are skipped for a cooldown
+    period.
+    """
+
+    def __init__(self, urls: list[str]):
+        self.engines = [
+            build_engine(url, label=f"replica-{i}") for i, url in enumerate(urls)
+        ]
+        self._next = 0
+        self._unhealthy_until: dict[int, float] = {}
+
+    def candidates(self) -> list[tuple[int, AsyncEngine]]:
+        """Healthy replicas in round-robin order, starting after the last pick."""
+        if not self.engines:
+            return []
+
+        now = time.monotonic()
+        count = len(self.engines)
+        start = self._next
+        self._next = (start + 1) % count
+        indexes = [(start + i) % count for i in range(count)]
+        return [
+            (index, self.engines[index])
+            for index in indexes
+            if self._unhealthy_until.get(index, 0) <= now
+        ]
+
+    def mark_unhealthy(self, index: int) -> None:
+        self._unhealthy_until[index] = (
+            time.monotonic() + settings.database_replica_cooldown_seconds
+        )
+        replica_failovers.inc(pool=f"replica-{index}")
+
+    async def dispose(self) -> None:
+        for engine in self.engines:
+            await engine.dispose()
+
+
+replicas = ReplicaRouter(
+    [str(url) for url in settings.database_replica_urls],
+)
+
+# Carries the read-your-writes window with the client, so it holds whichever
+# worker or pod serves the next request
+PRIMARY_UNTIL_COOKIE = "primary_until"
+
+
+def pin_reads_to_primary(response: Response) -> None:
+    """Send the client's reads to the primary for the read-your-writes window.
+
+    Call after committing a write the client will want to read back, despite
+    replication lag.
+    """
+    window = settings.database_replica_sticky_seconds
+    response.set_cookie(
+        PRIMARY_UNTIL_COOKIE,
+        f"{time.time() + window:.3f}",
+        max_age=math.ceil(window),
+        httponly=True,
+        samesite="lax",
+    )
+
+
+def reads_pinned_to_primary(request: Request) -> bool:
+    try:
+        until = float(request.cookies.get(PRIMARY_UNTIL_COOKIE, 0))
+    except ValueError:
+        return False
+    return until > time.time()
+
 
 class Base(DeclarativeBase):
     """Base class for all database models."""
@@ -46,7 +214,7 @@ class TimestampedBase(Base):
         DateTime(timezone=True), server_default=func.now()
     )
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now()
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
 
@@ -62,6 +230,34 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+@asynccontextmanager
+async def open_read_session(
+    use_primary: bool = False,
+) -> AsyncGenerator[AsyncSession, None]:
+    """Open a session for read-only work, preferring a healthy replica.
+
+    Falls back to the primary when no replica is configured or reachable, or
+    when `use_primary` is set, e.g. right after the caller wrote.
+    """
+    if not use_primary:
+        for index, replica in replicas.candidates():
+            session = async_session_maker(bind=replica)
+            try:
+                # Connect eagerly so an unreachable replica fails over here
+                await session.connection()
+            except (DBAPIError, OSError):
+                await session.close()
+                replicas.mark_unhealthy(index)
+                continue
+
+            async with session:
+                yield session
+            return
+
+    async with async_session_maker() as session:
+        yield session
+
+
 async def get_user_db(session: AsyncSession = Depends(get_async_session)):
     """Get a user database."""
     from app.auth.models import User, OAuthAccount
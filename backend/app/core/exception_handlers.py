@@ -4,7 +4,20 @@ from fastapi.responses import JSONResponse
 
 def register_exception_handlers(app: FastAPI) -> None:
     """Register exception handlers."""
-    from app.media.exceptions import MediaNotFound, UnsupportedMediaType, FileTooLarge
+    from app.auth.exceptions import PasswordHashingBusy
+    from app.core.profiling import ProfileInProgress
+    from app.core.rate_limit import RateLimitExceeded
+    from app.media.exceptions import (
+        EventStreamLimitReached,
+        FileTooLarge,
+        InvalidImageVariant,
+        InvalidSyncToken,
+        MediaNotFound,
+        MediaRestoring,
+        StorageQuotaExceeded,
+        UnreadableImage,
+        UnsupportedMediaType,
+    )
 
     @app.exception_handler(MediaNotFound)
     async def _(req: Request, exc: MediaNotFound):
@@ -26,3 +39,70 @@ def register_exception_handlers(app: FastAPI) -> None:
             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
             content={"detail": str(exc)},
         )
+
+    @app.exception_handler(StorageQuotaExceeded)
+    async def _(req: Request, exc: StorageQuotaExceeded):
+        return JSONResponse(
+            status_code=status.HTTP_403_FORBIDDEN,
+            content={"detail": str(exc)},
+        )
+
+    @app.exception_handler(InvalidSyncToken)
+    async def _(req: Request, exc: InvalidSyncToken):
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"detail": str(exc)},
+        )
+
+    @app.exception_handler(InvalidImageVariant)
+    async def _(req: Request, exc: InvalidImageVariant):
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"detail": str(exc)},
+        )
+
+    @app.exception_handler(UnreadableImage)
+    async def _(req: Request, exc: UnreadableImage):
+        return JSONResponse(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            content={"detail": str(exc)},
+        )
+
+    @app.exception_handler(MediaRestoring)
+    async def _(req: Request, exc: MediaRestoring):
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"detail": str(exc)},
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
+    @app.exception_handler(EventStreamLimitReached)
+    async def _(req: Request, exc: EventStreamLimitReached):
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"detail": str(exc)},
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
+    @app.exception_handler(PasswordHashingBusy)
+    async def _(req: Request, exc: PasswordHashingBusy):
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": str(exc)},
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
+    @app.exception_handler(RateLimitExceeded)
+    async def _(req: Request, exc: RateLimitExceeded):
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"detail": str(exc)},
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
+    @app.exception_handler(ProfileInProgress)
+    async def _(req: Request, exc: ProfileInProgress):
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={"detail": str(exc)},
+        )
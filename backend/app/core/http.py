@@ -0,0 +1,43 @@
+import httpx
+
+from app.core.settings import settings
+
+
+class HTTPClientManager:
+    """Owns the process-wide pooled HTTP client for outbound API calls."""
+
+    def __init__(self):
+        self._client: httpx.AsyncClient | None = None
+
+    def start(self) -> None:
+        """Create the connection pool if it does not exist yet."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=settings.http_client_http2,
+                timeout=httpx.Timeout(
+                    settings.http_client_timeout_seconds,
+                    connect=settings.http_client_connect_timeout_seconds,
+                ),
+                limits=httpx.Limits(
+                    max_connections=settings.http_client_max_connections,
+                    max_keepalive_connections=settings.http_client_max_keepalive,
+                ),
+            )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Lazy initialization of the HTTP client."""
+        self.start()
+        return self._client
+
+    @client.setter
+    def client(self, client: httpx.AsyncClient) -> None:
+        self._client = client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+http_client = HTTPClientManager()
@@ -0,0 +1,122 @@
+import asyncio
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import registry
+
+request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route.",
+    ["method", "route"],
+)
+requests_total = registry.counter(
+    "http_requests_total",
+    "HTTP requests by route and status.",
+    ["method", "route", "status"],
+)
+requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served."
+)
+request_db_queries = registry.histogram(
+    "http_request_db_queries",
+    "SQL statements executed per HTTP request.",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+request_db_seconds = registry.histogram(
+    "http_request_db_seconds",
+    "Time spent executing SQL per HTTP request.",
+    ["method", "route"],
+)
+db_queries_total = registry.counter("db_queries_total", "SQL statements executed.")
+event_loop_lag = registry.histogram(
+    "event_loop_lag_seconds",
+    "Delay of a periodic event loop callback beyond its schedule.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+class RequestStats:
+    """SQL usage accumulated while serving one request."""
+
+    __slots__ = ("queries", "query_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "request_stats", default=None
+)
+
+
+# The start time lives on the statement's execution context, not the pooled
+# connection, so statements that raise leave nothing behind
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "query_start", None)
+    elapsed = 0.0 if start is None else time.perf_counter() - start
+    db_queries_total.inc()
+    stats = request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += elapsed
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, in-flight requests and SQL usage."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            requests_in_flight.dec()
+            request_stats.reset(token)
+
+            # Label by route template, not the raw path, to bound cardinality
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            request_duration.observe(elapsed, method=method, route=route)
+            requests_total.inc(method=method, route=route, status=str(status_code))
+            request_db_queries.observe(stats.queries, method=method, route=route)
+            request_db_seconds.observe(stats.query_seconds, method=method, route=route)
+
+
+async def monitor_event_loop_lag(interval: float = 0.5) -> None:
+    """Measure how late a periodic sleep wakes up, forever."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        event_loop_lag.observe(max(0.0, loop.time() - start - interval))
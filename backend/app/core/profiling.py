@@ -0,0 +1,208 @@
+import asyncio
+import os
+import sys
+import sysconfig
+import threading
+from collections import Counter
+from functools import lru_cache
+from types import FrameType
+from typing import Literal
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+ProfileMode = Literal["wall", "cpu"]
+
+MAX_STACK_DEPTH = 128
+
+# Stripped from file names, longest first, to keep frames readable
+PATH_PREFIXES = sorted(
+    {os.path.join(path, "") for path in sysconfig.get_paths().values()},
+    key=len,
+    reverse=True,
+)
+
+# Leaf frames of threads that are blocked rather than running Python code
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("thread.py", "_worker"),
+    ("queue.py", "get"),
+}
+
+
+class ProfileInProgress(Exception):
+    """Another profile is already being captured in this worker."""
+
+    def __init__(self):
+        super().__init__("A profile is already being captured in this worker")
+
+
+@lru_cache(maxsize=4096)
+def _short_path(filename: str) -> str:
+    for prefix in PATH_PREFIXES:
+        if filename.startswith(prefix):
+            return filename.removeprefix(prefix)
+    return os.path.relpath(filename) if os.path.isabs(filename) else filename
+
+
+def _collapse(frame: FrameType | None, thread_name: str) -> str:
+    """Render a stack in the collapsed format read by flamegraph tools."""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        path = _short_path(code.co_filename)
+        names.append(f"{code.co_qualname} ({path}:{code.co_firstlineno})")
+        frame = frame.f_back
+    names.append(thread_name)
+    return ";".join(reversed(names))
+
+
+def _is_idle(frame: FrameType) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+
+
+class SamplingProfiler:
+    """Samples the stacks of every thread in this worker from a side thread.
+
+    In `wall` mode every sample is kept; `cpu` mode drops threads blocked on
+    I/O or locks, which approximates on-CPU time. When a path prefix or header
+    is given, samples are only taken while a matching request is in flight.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._stacks: Counter[str] = Counter()
+        self._in_flight = 0
+        self._capture = 0  # Bumped per start, so requests count only once
+        self.path_prefix: str | None = None
+        self.header: bytes | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def filtered(self) -> bool:
+        return self.path_prefix is not None or self.header is not None
+
+    def matches(self, scope: Scope) -> bool:
+        if self.path_prefix is not None and not scope["path"].startswith(
+            self.path_prefix
+        ):
+            return False
+        if self.header is not None:
+            return any(name == self.header for name, _ in scope["headers"])
+        return True
+
+    def request_started(self) -> int:
+        """Count a matching request in flight, returns the capture it counts in."""
+        with self._lock:
+            self._in_flight += 1
+            return self._capture
+
+    def request_finished(self, capture: int) -> None:
+        with self._lock:
+            # Requests from an earlier capture were not counted in this one
+            if capture == self._capture:
+                self._in_flight -= 1
+
+    def start(
+        self,
+        interval: float,
+        mode: ProfileMode = "wall",
+        path_prefix: str | None = None,
+        header: str | None = None,
+    ) -> None:
+        with self._lock:
+            if self._thread is not None:
+                raise ProfileInProgress()
+            self._stacks = Counter()
+            self._capture += 1
+            self._in_flight = 0
+            self.path_prefix = path_prefix
+            self.header = header.lower().encode("latin-1") if header else None
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._sample, args=(interval, mode), name="profiler"
+            )
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self) -> Counter[str]:
+        """Stop sampling and return sample counts per collapsed stack."""
+        thread = self._thread
+        if thread is None:
+            return Counter()
+        self._stop.set()
+        thread.join()
+        with self._lock:
+            self._thread = None
+            self.path_prefix = None
+            self.header = None
+            return self._stacks
+
+    def _sample(self, interval: float, mode: ProfileMode) -> None:
+        own_ident = threading.get_ident()
+        while not self._stop.wait(interval):
+            if self.filtered and self._in_flight == 0:
+                continue
+
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident or (mode == "cpu" and _is_idle(frame)):
+                    continue
+                stack = _collapse(frame, names.get(ident, f"thread-{ident}"))
+                self._stacks[stack] += 1
+
+    async def capture(
+        self,
+        seconds: float,
+        interval: float,
+        mode: ProfileMode = "wall",
+        path_prefix: str | None = None,
+        header: str | None = None,
+    ) -> Counter[str]:
+        """Sample for `seconds` without blocking the event loop."""
+        self.start(interval, mode, path_prefix, header)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            stacks = self.stop()
+        return stacks
+
+
+def render_collapsed(stacks: Counter[str]) -> str:
+    """One `frame;frame;frame count` line per stack, for flamegraph.pl."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class ProfilingMiddleware:
+    """Tracks in-flight requests matching the active profile's filter.
+
+    Only installed when profiling is enabled, so it costs nothing otherwise.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not profiler.filtered
+            or not profiler.matches(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        capture = profiler.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.request_finished(capture)
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,145 @@
+import logging
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """A request ran more SQL statements than its route allows."""
+
+    def __init__(self, route: str, budget: int, queries: int):
+        self.route = route
+        self.budget = budget
+        self.queries = queries
+        super().__init__(f"{route} ran {queries} SQL statements, budget is {budget}")
+
+
+class RepeatedQuery(Exception):
+    """The same SQL statement ran repeatedly in one request, a likely N+1."""
+
+    def __init__(self, route: str, statement: str, count: int):
+        self.route = route
+        self.statement = statement
+        self.count = count
+        super().__init__(f"{route} ran the same statement {count} times: {statement}")
+
+
+def query_budget[F: Callable](max_queries: int) -> Callable[[F], F]:
+    """Declare the maximum number of SQL statements a route may run."""
+
+    def decorator(func: F) -> F:
+        func.query_budget = max_queries
+        return func
+
+    return decorator
+
+
+class QueryLog:
+    """SQL statements run within one request or `capture_queries` block."""
+
+    def __init__(self, scope: Scope | None = None):
+        self.scope = scope
+        self.statements: Counter[str] = Counter()
+
+    @property
+    def count(self) -> int:
+        return self.statements.total()
+
+    @property
+    def route(self) -> str:
+        if self.scope is None:
+            return "<capture>"
+        return getattr(self.scope.get("route"), "path", "unmatched")
+
+    @property
+    def budget(self) -> int | None:
+        if self.scope is None:
+            return None
+        endpoint = getattr(self.scope.get("route"), "endpoint", None)
+        return getattr(endpoint, "query_budget", settings.sql_budget_default)
+
+    def repeated(self) -> dict[str, int]:
+        """Statements that ran at least `sql_repeat_threshold` times."""
+        return {
+            statement: count
+            for statement, count in self.statements.items()
+            if count >= settings.sql_repeat_threshold
+        }
+
+    def problems(self) -> list[Exception]:
+        problems: list[Exception] = []
+        budget = self.budget
+        if budget is not None and self.count > budget:
+            problems.append(QueryBudgetExceeded(self.route, budget, self.count))
+        for statement, count in self.repeated().items():
+            problems.append(RepeatedQuery(self.route, statement, count))
+        return problems
+
+
+query_log: ContextVar[QueryLog | None] = ContextVar("query_log", default=None)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    log = query_log.get()
+    if log is None:
+        return
+
+    log.statements[statement] += 1
+    if settings.sql_budget_mode == "raise" and log.scope is not None:
+        # Fail at the offending statement so the traceback points at it
+        problems = log.problems()
+        if problems:
+            raise problems[0]
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryLog]:
+    """Record SQL statements run inside the block, e.g. in a pytest fixture.
+
+    Example:
+        with capture_queries() as log:
+            client.get("/api/v1/media")
+        assert log.count <= 4
+        assert not log.repeated()
+    """
+    log = QueryLog()
+    token = query_log.set(log)
+    try:
+        yield log
+    finally:
+        query_log.reset(token)
+
+
+class QueryBudgetMiddleware:
+    """Enforce per-route SQL budgets and flag repeated statements.
+
+    Meant for development and tests: in `log` mode problems are logged after
+    the request, in `raise` mode the offending statement raises.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog(scope)
+        token = query_log.set(log)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            query_log.reset(token)
+            for problem in log.problems():
+                logger.warning("%s", problem)
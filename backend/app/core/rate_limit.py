@@ -0,0 +1,132 @@
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import sqlalchemy as sa
+from sqlalchemy import DateTime, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base, engine
+from app.core.metrics import registry
+from app.core.settings import settings
+
+rate_limit_rejected = registry.counter(
+    "rate_limit_rejected_total", "Requests rejected by rate limits.", ["limit"]
+)
+
+
+class RateLimitExceeded(Exception):
+    """Request exceeds a rate limit."""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__("Rate limit exceeded")
+
+
+class RateLimit:
+    """Token bucket parameters for one limited route."""
+
+    def __init__(self, name: str, capacity: int, per_minute: int):
+        self.name = name
+        self.capacity = capacity
+        self.refill_per_second = per_minute / 60
+
+
+class RateLimitBucket(Base):
+    """Token bucket state shared by all workers."""
+
+    __tablename__ = "rate_limit_bucket"
+    # Buckets are cheap to lose, so skip the WAL
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    key: Mapped[str] = mapped_column(sa.String(255), primary_key=True)
+    tokens: Mapped[float] = mapped_column(sa.Float, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+class InMemoryRateLimiter:
+    """Per-process token buckets, kept in a bounded LRU."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def hit(self, limit: RateLimit, key: str, cost: int = 1) -> None:
+        """Take `cost` tokens or raise RateLimitExceeded."""
+        bucket_key = f"{limit.name}:{key}"
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(bucket_key, (limit.capacity, now))
+        refilled = tokens + (now - updated) * limit.refill_per_second
+        tokens = min(limit.capacity, refilled)
+
+        if tokens < cost:
+            rate_limit_rejected.inc(limit=limit.name)
+            raise RateLimitExceeded((cost - tokens) / limit.refill_per_second)
+
+        self._buckets[bucket_key] = (tokens - cost, now)
+        self._buckets.move_to_end(bucket_key)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+
+class PostgresRateLimiter:
+    """Token buckets in Postgres, shared by every worker.
+
+    Each hit is a single atomic upsert that only takes tokens when enough
+    have refilled.
+    """
+
+    # Refilled token count, given the bucket row `b`
+    REFILLED = (
+        "LEAST(CAST(:capacity AS float8), b.tokens + CAST(:rate AS float8)"
+        " * EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at))"
+    )
+    TAKE = text(
+        f"""
+        INSERT INTO rate_limit_bucket AS b (key, tokens, updated_at)
+        VALUES (
+            :key,
+            CAST(:capacity AS float8) - CAST(:cost AS float8),
+            clock_timestamp()
+        )
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = {REFILLED} - CAST(:cost AS float8),
+            updated_at = clock_timestamp()
+        WHERE {REFILLED} >= CAST(:cost AS float8)
+        RETURNING tokens
+        """
+    )
+    AVAILABLE = text(
+        f"SELECT {REFILLED} FROM rate_limit_bucket AS b WHERE b.key = :key"
+    )
+
+    async def hit(self, limit: RateLimit, key: str, cost: int = 1) -> None:
+        """Take `cost` tokens or raise RateLimitExceeded."""
+        params = {
+            "key": f"{limit.name}:{key}",
+            "capacity": limit.capacity,
+            "rate": limit.refill_per_second,
+            "cost": cost,
+        }
+        async with engine.begin() as conn:
+            if cost <= limit.capacity:
+                taken = (await conn.execute(self.TAKE, params)).first()
+                if taken is not None:
+                    return
+            available = (await conn.execute(self.AVAILABLE, params)).scalar()
+
+        rate_limit_rejected.inc(limit=limit.name)
+        tokens = limit.capacity if available is None else available
+        raise RateLimitExceeded((cost - tokens) / limit.refill_per_second)
+
+
+def build_rate_limiter() -> InMemoryRateLimiter | PostgresRateLimiter:
+    if settings.rate_limit_backend == "postgres":
+        return PostgresRateLimiter()
+    return InMemoryRateLimiter()
+
+
+rate_limiter = build_rate_limiter()
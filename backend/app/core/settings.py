@@ -1,6 +1,7 @@
 from pathlib import Path
+from typing import Literal, Self
 
-from pydantic import Field, PostgresDsn, SecretStr
+from pydantic import Field, PostgresDsn, SecretStr, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -19,15 +20,42 @@ class Settings(BaseSettings):
     environment: str = "development"
     debug: bool = True
     log_level: str = "INFO"
+    metrics_enabled: bool = True
+
+    # Sampling profiler for superusers, off unless explicitly enabled
+    profiling_enabled: bool = False
+    profiling_max_seconds: float = 60.0
+
+    # SQL budgets per request, for development and tests
+    sql_budget_mode: Literal["off", "log", "raise"] = "off"
+    sql_budget_default: int = 10  # For routes without @query_budget
+    sql_repeat_threshold: int = 3  # Identical statements flagged as N+1
 
     # Database
     database_url: PostgresDsn = Field(
         default="postgresql+asyncpg://postgres:postgres@db:5432/atlasnap", repr=False
     )
+    database_echo: bool = False
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_timeout_seconds: float = 30.0
+    database_pool_recycle_seconds: int = 1800  # -1 disables recycling
+    database_pool_pre_ping: bool = True
+    database_statement_cache_size: int = 100  # asyncpg prepared statements
+    database_pgbouncer_mode: bool = False  # For PgBouncer in transaction mode
+    # Direct connection for the media status LISTEN, which PgBouncer in
+    # transaction mode doesn't support; database_url when unset
+    database_listen_url: PostgresDsn | None = Field(default=None, repr=False)
+    database_replica_urls: list[PostgresDsn] = Field(default=[], repr=False)
+    database_replica_sticky_seconds: float = 5.0  # Read-your-writes window
+    database_replica_cooldown_seconds: float = 30.0  # After a replica failure
 
     # Auth
     jwt_secret: SecretStr = SecretStr("change_me")
     jwt_lifetime_seconds: int = 3600
+    jwt_cache_size: int = 10_000  # Verified tokens kept in memory, 0 disables
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 64  # Logins beyond this get a 503
 
     # Google OAuth
     google_client_id: SecretStr
@@ -36,6 +64,21 @@ class Settings(BaseSettings):
         "http://localhost:8000/api/v1/auth/google/callback/redirect"
     )
     google_frontend_redirect_url: str = "http://localhost:3000/auth/google/callback"
+    google_userinfo_url: str = "https://www.googleapis.com/oauth2/v3/userinfo"
+
+    # Realtime events
+    events_max_connections: int = 1000  # Per worker process
+    events_max_connections_per_user: int = 5
+    events_queue_size: int = 100  # Slower clients are told to resync
+    events_heartbeat_seconds: float = 15.0
+    events_reconnect_seconds: float = 2.0
+
+    # Outbound HTTP
+    http_client_timeout_seconds: float = 10.0
+    http_client_connect_timeout_seconds: float = 3.0
+    http_client_max_connections: int = 100
+    http_client_max_keepalive: int = 20
+    http_client_http2: bool = False
 
     # AWS
     aws_access_key_id: SecretStr = SecretStr("test")
@@ -43,9 +86,26 @@ class Settings(BaseSettings):
     aws_region: str = "eu-central-1"
     s3_bucket_name: str = "atlasnap-media"
     s3_endpoint_url: str | None = None  # For LocalStack
+    # "sharded" spreads uploads over hash prefixes; "dated" is the legacy
+    # per-user, per-day layout. Existing keys stay valid under either.
+    s3_key_scheme: Literal["sharded", "dated"] = "sharded"
+    s3_key_shard_chars: int = 2  # Hex characters, 16**n shards
+
+    # Media delivery through presigned S3 URLs, or CloudFront signed with a
+    # local key. Cookie signing covers all of a user's files with one cookie.
+    delivery_backend: Literal["s3", "cloudfront"] = "s3"
+    cdn_base_url: str | None = None  # e.g. https://media.example.com
+    cdn_signing: Literal["url", "cookie"] = "url"
+    cdn_key_pair_id: str | None = None  # ID of the public key in CloudFront
+    cdn_private_key: SecretStr | None = None  # PEM, or use the path below
+    cdn_private_key_path: Path | None = None
+    cdn_cookie_domain: str | None = None  # Parent domain of the API and the CDN
+    cdn_cookie_expires_seconds: int = 43_200
+    cdn_expiry_step_seconds: int = 300  # Signatures are reused within a step
 
     # Upload limits
     max_upload_size_mb: int = 100
+    storage_quota_mb: int = 10_240  # Per user, 0 disables
     allowed_image_types: list[str] = [
         "image/jpeg",
         "image/png",
@@ -55,5 +115,75 @@ class Settings(BaseSettings):
     ]
     allowed_video_types: list[str] = ["video/mp4", "video/quicktime", "video/webm"]
 
+    # Rate limiting, in presigned URLs per user
+    rate_limit_backend: Literal["memory", "postgres"] = "memory"
+    rate_limit_upload_urls_burst: int = 400  # At least MAX_MEDIA_UPLOADS_NUM
+    rate_limit_upload_urls_per_minute: int = 200
+    # Idle Postgres buckets are deleted after this; longer than any bucket
+    # takes to refill, so a deleted bucket would have been full anyway
+    rate_limit_bucket_idle_seconds: int = 3600
+
+    # Media processing worker
+    processing_workers: int = 2  # Concurrent video jobs, each in its own process
+    processing_poll_seconds: float = 2.0
+    # Running jobs refresh `updated_at` at this interval; jobs without a
+    # heartbeat for the timeout, e.g. after a worker crash, are claimed again
+    processing_heartbeat_seconds: float = 60.0
+    processing_timeout_seconds: int = 600
+    ffmpeg_path: str = "ffmpeg"
+    ffprobe_path: str = "ffprobe"
+    transcode_threads: int = 2  # Per job
+    transcode_cpu_seconds: int = 1800  # Per ffmpeg run, enforced with RLIMIT_CPU
+    transcode_timeout_seconds: int = 3600  # Wall clock per ffmpeg run
+    hls_segment_seconds: int = 6
+    vips_path: str = "vips"
+    image_processing_workers: int = 4  # Concurrent jobs, separate from video
+    web_convert_types: list[str] = ["image/heic"]  # Converted to JPEG for browsers
+
+    # Maintenance jobs
+    orphan_grace_hours: int = 24  # Unconfirmed uploads younger than this are kept
+
+    # Storage tiering of originals that are rarely downloaded
+    access_tracking_resolution_hours: float = 24.0  # Per media and process
+    access_tracking_flush_seconds: float = 30.0
+    tiering_after_days: int = 90  # Without downloads
+    tiering_storage_class: Literal[
+        "STANDARD_IA", "GLACIER_IR", "GLACIER", "DEEP_ARCHIVE"
+    ] = "GLACIER_IR"
+    tiering_concurrency: int = 16  # Parallel S3 copies
+    restore_days: int = 7  # Lifetime of restored copies of archived originals
+    restore_tier: Literal["Expedited", "Standard", "Bulk"] = "Standard"
+    restore_retry_after_seconds: int = 900
+
+    # Resized image variants, rendered on demand by the API
+    image_variant_cache_mb: int = 128  # In-memory LRU per process
+    image_variant_concurrency: int = 4  # Renders per process
+
+    @model_validator(mode="after")
+    def check_listen_url(self) -> Self:
+        if self.database_pgbouncer_mode and self.database_listen_url is None:
+            raise ValueError(
+                "DATABASE_LISTEN_URL is required with DATABASE_PGBOUNCER_MODE, "
+                "PgBouncer in transaction mode can't LISTEN"
+            )
+        return self
+
+    @model_validator(mode="after")
+    def check_cdn(self) -> Self:
+        if self.delivery_backend != "cloudfront":
+            return self
+        missing = [
+            name.upper()
+            for name in ("cdn_base_url", "cdn_key_pair_id")
+            if getattr(self, name) is None
+        ]
+        if self.cdn_private_key is None and self.cdn_private_key_path is None:
+            missing.append("CDN_PRIVATE_KEY or CDN_PRIVATE_KEY_PATH")
+        if missing:
+            raise ValueError(
+                f"DELIVERY_BACKEND=cloudfront requires {', '.join(missing)}"
+            )
+        return self
+
 
 settings = Settings()
@@ -1,19 +1,52 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 
 from app.core.settings import settings
+from app.core.aws.s3 import s3_service
+from app.core.database import replicas
 from app.core.exception_handlers import register_exception_handlers
+from app.core.http import http_client
+from app.core.instrumentation import MetricsMiddleware, monitor_event_loop_lag
+from app.core.metrics import registry
+from app.core.profiling import ProfilingMiddleware, profiler
+from app.core.query_budget import QueryBudgetMiddleware
+from app.auth.hashing import password_hashing_pool
 from app.auth.router import router as auth_router
+from app.media.access import access_tracker
+from app.media.events import status_events
 from app.media.router import router as media_router
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup/shutdown events."""
+    http_client.start()
+    # Build the S3 client off the event loop, so neither startup nor the
+    # first upload request pays for importing boto3
+    s3_warmup = asyncio.create_task(asyncio.to_thread(lambda: s3_service.client))
+    lag_monitor = (
+        asyncio.create_task(monitor_event_loop_lag())
+        if settings.metrics_enabled
+        else None
+    )
     yield
+    with suppress(Exception):
+        await s3_warmup
+    if lag_monitor is not None:
+        lag_monitor.cancel()
+        with suppress(asyncio.CancelledError):
+            await lag_monitor
+    profiler.stop()
+    await status_events.stop()
+    await access_tracker.stop()
+    await http_client.aclose()
+    await replicas.dispose()
+    password_hashing_pool.shutdown()
 
 
 app = FastAPI(
@@ -31,10 +64,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.sql_budget_mode != "off":
+    app.add_middleware(QueryBudgetMiddleware)
+
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
 register_exception_handlers(app)
 
 app.include_router(auth_router, prefix="/api/v1/auth")
 app.include_router(media_router, prefix="/api/v1/media", tags=["media"])
+if settings.profiling_enabled:
+    from app.admin.router import router as admin_router
+
+    app.include_router(admin_router, prefix="/api/v1/admin", tags=["admin"])
 
 
 class RootResponse(BaseModel):
@@ -55,3 +101,9 @@ class HealthCheckResponse(BaseModel):
 def health_check():
     """Health check endpoint."""
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics endpoint."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from uuid import UUID
+
+from sqlalchemy import func, tuple_, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.database import engine
+from app.core.metrics import registry
+from app.core.settings import settings
+from .models import Media
+
+logger = logging.getLogger(__name__)
+
+# Media per UPDATE statement
+FLUSH_BATCH_SIZE = 1000
+
+access_writes = registry.counter(
+    "media_access_writes_total", "Media access times written to the database."
+)
+
+
+class AccessTracker:
+    """Records when media were last downloaded, for storage tiering.
+
+    Accesses are sampled: each process writes a media item at most once per
+    `access_tracking_resolution_hours`, which is plenty to tell hot media from
+    cold. Writes are buffered and flushed periodically as one UPDATE per
+    batch, instead of one per view.
+    """
+
+    def __init__(self, max_recent: int = 100_000):
+        self.max_recent = max_recent
+        # Keyed by (user_id, media_id), so writes can prune partitions
+        self._recent: OrderedDict[tuple[UUID, UUID], float] = OrderedDict()
+        self._pending: set[tuple[UUID, UUID]] = set()
+        self._flusher: asyncio.Task | None = None
+
+    def record(self, user_id: UUID, media_id: UUID) -> None:
+        key = (user_id, media_id)
+        now = time.monotonic()
+        recorded = self._recent.get(key)
+        resolution = settings.access_tracking_resolution_hours * 3600
+        if recorded is not None and now - recorded < resolution:
+            return
+
+        self._recent[key] = now
+        self._recent.move_to_end(key)
+        if len(self._recent) > self.max_recent:
+            self._recent.popitem(last=False)
+        self._pending.add(key)
+
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._run())
+
+    async def flush(self) -> None:
+        """Write buffered accesses; they are dropped if the write fails."""
+        # Sorted so concurrent flushes from other workers lock rows in order
+        keys = sorted(self._pending)
+        self._pending.clear()
+        for start in range(0, len(keys), FLUSH_BATCH_SIZE):
+            batch = keys[start : start + FLUSH_BATCH_SIZE]
+            try:
+                async with engine.begin() as conn:
+                    # Not a change to the media, so ETags and sync are unaffected
+                    await conn.execute(
+                        update(Media)
+                        .where(tuple_(Media.user_id, Media.id).in_(batch))
+                        .values(
+                            last_accessed_at=func.now(), updated_at=Media.updated_at
+                        )
+                    )
+            except (OSError, SQLAlchemyError):
+                logger.exception("Writing %d media access times failed", len(batch))
+            else:
+                access_writes.inc(len(batch))
+
+    async def _run(self) -> None:
+        while self._pending:
+            await asyncio.sleep(settings.access_tracking_flush_seconds)
+            await self.flush()
+
+    async def stop(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+
+access_tracker = AccessTracker()
@@ -1,3 +1,19 @@
 MAX_MEDIA_UPLOADS_NUM = (
     200  # Maximum number of media files that can be uploaded at once
 )
+
+MAX_SYNC_CHANGES = 1000  # Maximum number of changes returned per sync request
+
+# HLS rendition ladder: name, short side in pixels, video bitrate in kbps.
+# Renditions larger than the source are skipped.
+HLS_RENDITIONS = (
+    ("1080p", 1080, 5000),
+    ("720p", 720, 2800),
+    ("480p", 480, 1400),
+    ("360p", 360, 800),
+)
+HLS_AUDIO_KBPS = 128
+
+# Image variant sizes in pixels; requested sizes are rounded up to a step so
+# similar layouts share cached variants
+IMAGE_VARIANT_SIZES = (64, 128, 256, 384, 512, 768, 1024, 1536, 2048, 3072)
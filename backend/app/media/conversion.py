@@ -0,0 +1,45 @@
+import os
+import tempfile
+
+from app.core.aws.s3 import s3_service
+from app.core.settings import settings
+from .placeholders import try_compute_blurhash
+from .tools import run_tool
+
+WEB_QUALITY = 85
+
+
+def convert_to_web(source: str, target: str) -> None:
+    """Convert an image browsers can't display, e.g. HEIC, to a JPEG."""
+    # autorot applies the EXIF orientation before metadata is stripped
+    run_tool(
+        [
+            settings.vips_path,
+            "autorot",
+            source,
+            f"{target}[Q={WEB_QUALITY},strip,optimize_coding]",
+        ]
+    )
+
+
+def process_image(s3_key: str, mime_type: str) -> dict[str, str | None]:
+    """Compute the placeholder and, if needed, a web derivative of an image.
+
+    Runs in a processing worker process; returns the Media fields to set.
+    Conversion is skipped when the derivative already exists.
+    """
+    fields: dict[str, str | None] = {}
+    with tempfile.TemporaryDirectory(prefix="image-") as workdir:
+        source = os.path.join(workdir, "source" + os.path.splitext(s3_key)[1])
+        s3_service.download_file(s3_key, source)
+
+        if mime_type in settings.web_convert_types:
+            web_key = f"{s3_service.derived_prefix(s3_key)}/web.jpg"
+            if s3_service.head_object(web_key) is None:
+                target = os.path.join(workdir, "web.jpg")
+                convert_to_web(source, target)
+                s3_service.upload_file(target, web_key, "image/jpeg")
+            fields["web_key"] = web_key
+
+        fields["blurhash"] = try_compute_blurhash(source)
+    return fields
@@ -0,0 +1,91 @@
+from urllib.parse import quote, unquote, urlencode
+from uuid import UUID
+
+from app.core.aws.cloudfront import cloudfront_signer
+from app.core.aws.s3 import s3_service
+from app.core.settings import settings
+
+
+class S3Delivery:
+    """Media served straight from S3 through presigned URLs."""
+
+    def download_url(
+        self, key: str, filename: str | None = None, expires_in: int = 3600
+    ) -> str:
+        return s3_service.create_presigned_download_url(key, expires_in, filename)
+
+    def cookies(self, user_id: UUID) -> tuple[dict[str, str], int] | None:
+        return None
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        return str(UUID(value)) == value
+    except ValueError:
+        return False
+
+
+def origin_key(path: str) -> str | None:
+    """S3 key of a cookie-signed CDN path, or None if CloudFront rejects it.
+
+    Cookie-signed paths are `/{user_id}/{key}`, so the cookie resource can end
+    in the user's prefix. The key must belong to that same user, or a cookie
+    would reach other users' files below its own prefix. Mirrors the
+    CloudFront Function in `scripts/cloudfront-user-prefix.js`.
+    """
+    segments = path.split("/")  # ["", user_id, root, ...]
+    if len(segments) < 5 or segments[0] or not _is_uuid(segments[1]):
+        return None
+    key = segments[2:]
+    if any(unquote(segment) in (".", "..") for segment in key):
+        return None
+    # media/{user_id}/{date}/... or media/{shard}/{user_id}/..., as in
+    # S3Service.key_user_id
+    owner = next((segment for segment in key[1:3] if _is_uuid(segment)), None)
+    if owner != segments[1]:
+        return None
+    return "/".join(key)
+
+
+class CloudFrontDelivery:
+    """Media served through CloudFront, cached at the edge.
+
+    With `cdn_signing` set to `cookie`, URLs are unsigned and one signed
+    cookie per user grants access to all of the user's files, so a gallery
+    or an HLS stream needs a single signature. Their paths start with the
+    owner's ID, see `origin_key`.
+    """
+
+    def download_url(
+        self, key: str, filename: str | None = None, expires_in: int = 3600
+    ) -> str:
+        path = quote(key)
+        if settings.cdn_signing == "cookie":
+            path = f"{s3_service.key_user_id(key)}/{path}"
+        url = f"{settings.cdn_base_url.rstrip('/')}/{path}"
+        if filename:
+            # Forwarded to the S3 origin; include it in the cache policy
+            disposition = f"attachment; filename={filename}"
+            url += "?" + urlencode({"response-content-disposition": disposition})
+        if settings.cdn_signing == "url":
+            url = cloudfront_signer.signed_url(url, expires_in)
+        return url
+
+    def cookies(self, user_id: UUID) -> tuple[dict[str, str], int] | None:
+        """Signed cookies for the user's files and their epoch expiry."""
+        if settings.cdn_signing != "cookie":
+            return None
+        # No wildcard before the user's prefix: * also matches / and ?
+        resource = f"{settings.cdn_base_url.rstrip('/')}/{user_id}/*"
+        return cloudfront_signer.signed_cookies(
+            resource, settings.cdn_cookie_expires_seconds
+        )
+
+
+def build_delivery() -> S3Delivery | CloudFrontDelivery:
+    if settings.delivery_backend == "cloudfront":
+        return CloudFrontDelivery()
+    return S3Delivery()
+
+
+delivery = build_delivery()
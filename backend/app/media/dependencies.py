@@ -1,15 +1,33 @@
+from collections.abc import AsyncGenerator
 from uuid import UUID
 
-from fastapi import Depends
+from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.dependencies import current_active_verified_user
 from app.auth.models import User
-from app.core.database import get_async_session
+from app.core.database import (
+    get_async_session,
+    open_read_session,
+    reads_pinned_to_primary,
+)
 from .models import Media
 from .services import MediaService
 
 
+async def get_read_session(
+    request: Request,
+    user: User = Depends(current_active_verified_user),
+) -> AsyncGenerator[AsyncSession, None]:
+    """Get a session for read-only endpoints, routed to a replica if possible.
+
+    Requests within the read-your-writes window of a write stay on the
+    primary, see `pin_reads_to_primary`.
+    """
+    async with open_read_session(reads_pinned_to_primary(request)) as session:
+        yield session
+
+
 async def get_media_by_id(
     media_id: UUID,
     session: AsyncSession = Depends(get_async_session),
@@ -17,3 +35,12 @@ async def get_media_by_id(
 ) -> Media:
     """Fetch media, ensuring ownership."""
     return await MediaService.get(session, media_id, user.id)
+
+
+async def get_readable_media_by_id(
+    media_id: UUID,
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_active_verified_user),
+) -> Media:
+    """Fetch media for read-only use, ensuring ownership."""
+    return await MediaService.get(session, media_id, user.id)
@@ -0,0 +1,165 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from collections.abc import AsyncGenerator
+from uuid import UUID
+
+import asyncpg
+
+from app.core.metrics import registry
+from app.core.settings import settings
+from .exceptions import EventStreamLimitReached
+
+logger = logging.getLogger(__name__)
+
+# Postgres channel written by the media status trigger
+STATUS_CHANNEL = "media_status"
+
+RESYNC_EVENT = "event: resync\ndata: {}\n\n"
+
+event_streams_dropped = registry.counter(
+    "media_event_streams_dropped_total",
+    "Event streams closed because the client could not keep up.",
+)
+
+
+class Subscription:
+    """Bounded queue of events for one connected client."""
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def push(self, message: str) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # The client will be told to resync instead of buffering forever
+            self.overflowed = True
+
+
+class StatusEventBroker:
+    """Fans out media status notifications to per-user subscribers.
+
+    Each worker process holds a single LISTEN connection to Postgres, no
+    matter how many clients are connected. The connection is opened with the
+    first subscriber and reopened after failures; subscribers are asked to
+    resync since notifications sent in between are lost.
+    """
+
+    def __init__(self):
+        self._subscribers: dict[UUID, set[Subscription]] = defaultdict(set)
+        self._count = 0
+        self._listener: asyncio.Task | None = None
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def check_capacity(self, user_id: UUID) -> None:
+        """Raise unless the global and per-user connection caps allow a client."""
+        if self._count >= settings.events_max_connections:
+            raise EventStreamLimitReached()
+        subscribers = self._subscribers.get(user_id, ())
+        if len(subscribers) >= settings.events_max_connections_per_user:
+            raise EventStreamLimitReached()
+
+    def subscribe(self, user_id: UUID) -> Subscription:
+        """Register a client, enforcing the connection caps."""
+        self.check_capacity(user_id)
+        subscription = Subscription(settings.events_queue_size)
+        self._subscribers[user_id].add(subscription)
+        self._count += 1
+
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        return subscription
+
+    def unsubscribe(self, user_id: UUID, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(user_id)
+        if subscribers is None or subscription not in subscribers:
+            return
+
+        subscribers.discard(subscription)
+        self._count -= 1
+        if not subscribers:
+            del self._subscribers[user_id]
+
+    def _dispatch(self, payload: str) -> None:
+        try:
+            user_id = UUID(json.loads(payload)["user_id"])
+        except (ValueError, KeyError, TypeError):
+            return
+
+        message = f"event: status\ndata: {payload}\n\n"
+        for subscription in self._subscribers.get(user_id, ()):
+            subscription.push(message)
+
+    def _broadcast(self, message: str) -> None:
+        for subscribers in self._subscribers.values():
+            for subscription in subscribers:
+                subscription.push(message)
+
+    async def _listen(self) -> None:
+        url = settings.database_listen_url or settings.database_url
+        dsn = str(url).replace("+asyncpg", "", 1)
+        first = True
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(
+                    STATUS_CHANNEL,
+                    lambda _conn, _pid, _channel, payload: self._dispatch(payload),
+                )
+                if not first:
+                    self._broadcast(RESYNC_EVENT)
+                first = False
+                await closed.wait()
+                logger.warning("Status LISTEN connection closed, reconnecting")
+            except Exception:
+                # Anything but cancellation is retried, or events stop until
+                # the next client subscribes
+                logger.exception("Status LISTEN connection failed, retrying")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    connection.terminate()  # Unlike close(), never raises
+
+            await asyncio.sleep(settings.events_reconnect_seconds)
+
+    async def stream(self, subscription: Subscription) -> AsyncGenerator[str, None]:
+        """Render a subscription as Server-Sent Events with heartbeats."""
+        yield "retry: 5000\n\n"
+        while True:
+            if subscription.overflowed:
+                event_streams_dropped.inc()
+                yield RESYNC_EVENT
+                return
+
+            try:
+                yield await asyncio.wait_for(
+                    subscription.queue.get(), settings.events_heartbeat_seconds
+                )
+            except TimeoutError:
+                yield ": keepalive\n\n"
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+
+status_events = StatusEventBroker()
+
+registry.gauge(
+    "media_event_streams",
+    "Connected media status event streams.",
+    callback=lambda: status_events.count,
+)
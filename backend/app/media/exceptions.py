@@ -27,3 +27,47 @@ class FileTooLarge(MediaError):
     def __init__(self, max_mb: int):
         self.max_mb = max_mb
         super().__init__(f"File exceeds {max_mb}MB limit")
+
+
+class StorageQuotaExceeded(MediaError):
+    """Upload would exceed the user's storage quota."""
+
+    def __init__(self, quota_mb: int):
+        self.quota_mb = quota_mb
+        super().__init__(f"Storage quota of {quota_mb}MB exceeded")
+
+
+class InvalidSyncToken(MediaError):
+    """Delta sync token could not be parsed."""
+
+    def __init__(self, token: str):
+        self.token = token
+        super().__init__(f"Invalid sync token: {token}")
+
+
+class EventStreamLimitReached(MediaError):
+    """Too many event streams are open."""
+
+    def __init__(self, retry_after: int = 30):
+        self.retry_after = retry_after
+        super().__init__("Too many open event streams")
+
+
+class InvalidImageVariant(MediaError):
+    """Image variant parameters are invalid."""
+
+
+class UnreadableImage(MediaError):
+    """The source image could not be decoded, e.g. a corrupt upload."""
+
+    def __init__(self, media_id: UUID):
+        self.media_id = media_id
+        super().__init__(f"Image of media {media_id} could not be read")
+
+
+class MediaRestoring(MediaError):
+    """The original is in archive storage and is being restored."""
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__("Media is being restored from archive storage")
@@ -0,0 +1,284 @@
+import argparse
+import asyncio
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from botocore.exceptions import ClientError
+from sqlalchemy import Row, delete, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.models import User
+from app.core.aws.s3 import s3_service
+from app.core.database import async_session_maker
+from app.core.rate_limit import RateLimitBucket
+from app.core.settings import settings
+from .models import Media, MediaLibrary
+
+EMPTY_USAGE = {
+    f"{media_type.value}_{kind}": 0
+    for media_type in Media.Type
+    for kind in ("count", "bytes")
+}
+
+
+async def _reconcile_usage_batch(
+    session: AsyncSession, user_ids: Sequence[UUID]
+) -> int:
+    # Lock the ledgers first: concurrent uploads and deletes block on the
+    # ledger row, so their media rows are either counted here or applied
+    # as a delta after this transaction commits.
+    await session.execute(
+        insert(MediaLibrary)
+        .values([{"user_id": user_id} for user_id in user_ids])
+        .on_conflict_do_nothing()
+    )
+    result = await session.execute(
+        select(MediaLibrary).where(MediaLibrary.user_id.in_(user_ids)).with_for_update()
+    )
+    ledgers = result.scalars().all()
+
+    actual = {user_id: dict(EMPTY_USAGE) for user_id in user_ids}
+    rows = await session.execute(
+        select(
+            Media.user_id,
+            Media.media_type,
+            func.count(),
+            func.coalesce(func.sum(Media.file_size), 0),
+        )
+        .where(Media.user_id.in_(user_ids))
+        .group_by(Media.user_id, Media.media_type)
+    )
+    for user_id, media_type, count, size in rows:
+        actual[user_id][f"{media_type.value}_count"] = count
+        actual[user_id][f"{media_type.value}_bytes"] = size
+
+    corrected = 0
+    for ledger in ledgers:
+        usage = actual[ledger.user_id]
+        if any(getattr(ledger, name) != value for name, value in usage.items()):
+            for name, value in usage.items():
+                setattr(ledger, name, value)
+            corrected += 1
+    return corrected
+
+
+async def reconcile_usage(batch_size: int = 500) -> int:
+    """Recompute storage usage ledgers from media rows, fixing drift."""
+    corrected = 0
+    last_user_id: UUID | None = None
+
+    while True:
+        async with async_session_maker() as session:
+            query = select(User.id).order_by(User.id).limit(batch_size)
+            if last_user_id is not None:
+                query = query.where(User.id > last_user_id)
+            user_ids = (await session.execute(query)).scalars().all()
+            if not user_ids:
+                return corrected
+
+            corrected += await _reconcile_usage_batch(session, user_ids)
+            await session.commit()
+            last_user_id = user_ids[-1]
+
+
+async def _find_orphans(objects: list[dict]) -> list[dict]:
+    """Objects in the page without a media row, in a single query.
+
+    Keys without an owner are never confirmed, but are left alone as they
+    weren't uploaded through the API.
+    """
+    owned = {}
+    for obj in objects:
+        user_id = s3_service.key_user_id(obj["Key"])
+        if user_id is not None:
+            owned[obj["Key"]] = (user_id, obj["Key"])
+    if not owned:
+        return []
+
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(Media.s3_key).where(
+                tuple_(Media.user_id, Media.s3_key).in_(list(owned.values()))
+            )
+        )
+        known = set(result.scalars())
+    return [obj for obj in objects if obj["Key"] in owned and obj["Key"] not in known]
+
+
+async def reconcile_orphans(
+    delete: bool = False, grace_hours: int | None = None
+) -> Counter[str]:
+    """Find uploaded objects that were never confirmed, optionally deleting them.
+
+    Streams one listing page of up to 1000 keys at a time, per top-level
+    prefix, so memory stays flat however many objects the bucket holds. The
+    top-level prefixes are shards, or users for keys in the legacy dated
+    scheme; keys of deleted users are found too, since they are listed from
+    S3.
+    """
+    if grace_hours is None:
+        grace_hours = settings.orphan_grace_hours
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=grace_hours)
+    stats: Counter[str] = Counter()
+
+    for prefix_page in s3_service.list_pages("media/", delimiter="/"):
+        for top_prefix in prefix_page.get("CommonPrefixes", []):
+            for page in s3_service.list_pages(top_prefix["Prefix"]):
+                contents = page.get("Contents", [])
+                stats["scanned"] += len(contents)
+                # Recent objects may still be confirmed, leave them alone
+                objects = [obj for obj in contents if obj["LastModified"] < cutoff]
+                if not objects:
+                    continue
+
+                orphans = await _find_orphans(objects)
+                stats["orphans"] += len(orphans)
+                stats["orphan_bytes"] += sum(obj["Size"] for obj in orphans)
+                if not orphans:
+                    continue
+
+                if delete:
+                    if s3_service.delete_objects([obj["Key"] for obj in orphans]):
+                        stats["deleted"] += len(orphans)
+                else:
+                    for obj in orphans:
+                        print(f"{obj['Key']}\t{obj['Size']}\t{obj['LastModified']}")
+    return stats
+
+
+def _set_storage_class(row: Row, storage_class: str) -> tuple[UUID, UUID] | None:
+    try:
+        s3_service.set_storage_class(row.s3_key, storage_class)
+    except ClientError:
+        return None
+    return row.user_id, row.id
+
+
+async def tier_cold_media(
+    after_days: int | None = None,
+    storage_class: str | None = None,
+    batch_size: int = 500,
+) -> Counter[str]:
+    """Move originals not downloaded for a while to a cheaper storage class.
+
+    Only originals move; posters, web derivatives and image variants under
+    the derived prefix stay in STANDARD, so thumbnails stay fast. Media never
+    downloaded count from their upload time.
+    """
+    if after_days is None:
+        after_days = settings.tiering_after_days
+    tier = Media.StorageTier(storage_class or settings.tiering_storage_class)
+    cutoff = datetime.now(timezone.utc) - timedelta(days=after_days)
+    stats: Counter[str] = Counter()
+    last_id: UUID | None = None
+    loop = asyncio.get_running_loop()
+
+    with ThreadPoolExecutor(settings.tiering_concurrency) as executor:
+        while True:
+            async with async_session_maker() as session:
+                query = (
+                    select(Media.id, Media.user_id, Media.s3_key)
+                    .where(
+                        Media.status == Media.Status.COMPLETED,
+                        Media.storage_tier == Media.StorageTier.STANDARD,
+                        func.coalesce(Media.last_accessed_at, Media.created_at)
+                        < cutoff,
+                    )
+                    .order_by(Media.id)
+                    .limit(batch_size)
+                )
+                if last_id is not None:
+                    query = query.where(Media.id > last_id)
+                rows = (await session.execute(query)).all()
+            if not rows:
+                return stats
+            last_id = rows[-1].id
+
+            results = await asyncio.gather(
+                *(
+                    loop.run_in_executor(executor, _set_storage_class, row, tier.value)
+                    for row in rows
+                )
+            )
+            moved = [key for key in results if key is not None]
+            stats["failed"] += len(rows) - len(moved)
+            if not moved:
+                continue
+
+            # Recorded even if downloaded meanwhile, the object has moved
+            async with async_session_maker() as session:
+                await session.execute(
+                    update(Media)
+                    .where(tuple_(Media.user_id, Media.id).in_(moved))
+                    .values(storage_tier=tier, updated_at=Media.updated_at)
+                )
+                await session.commit()
+            stats["moved"] += len(moved)
+
+
+async def expire_rate_limit_buckets(idle_seconds: int | None = None) -> int:
+    """Delete rate limit buckets that have been idle long enough to be full.
+
+    A missing bucket starts full, so this only frees space. Only the
+    postgres rate limit backend stores buckets.
+    """
+    if idle_seconds is None:
+        idle_seconds = settings.rate_limit_bucket_idle_seconds
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=idle_seconds)
+    async with async_session_maker() as session:
+        result = await session.execute(
+            delete(RateLimitBucket).where(RateLimitBucket.updated_at < cutoff)
+        )
+        await session.commit()
+    return result.rowcount
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run media maintenance jobs.")
+    jobs = parser.add_subparsers(dest="job", required=True)
+
+    usage = jobs.add_parser("reconcile-usage", help=reconcile_usage.__doc__)
+    usage.add_argument("--batch-size", type=int, default=500)
+
+    orphans = jobs.add_parser("reconcile-orphans", help=reconcile_orphans.__doc__)
+    orphans.add_argument("--delete", action="store_true", help="Default: report")
+    orphans.add_argument("--grace-hours", type=int)
+
+    tiering = jobs.add_parser("tier-cold-media", help=tier_cold_media.__doc__)
+    tiering.add_argument("--after-days", type=int)
+    tiering.add_argument(
+        "--storage-class", choices=[tier.value for tier in Media.StorageTier][1:]
+    )
+    tiering.add_argument("--batch-size", type=int, default=500)
+
+    buckets = jobs.add_parser(
+        "expire-rate-limit-buckets", help=expire_rate_limit_buckets.__doc__
+    )
+    buckets.add_argument("--idle-seconds", type=int)
+
+    args = parser.parse_args()
+    if args.job == "reconcile-usage":
+        corrected = asyncio.run(reconcile_usage(args.batch_size))
+        print(f"Corrected {corrected} usage ledgers")
+    elif args.job == "reconcile-orphans":
+        stats = asyncio.run(reconcile_orphans(args.delete, args.grace_hours))
+        print(
+            f"Scanned {stats['scanned']} objects, found {stats['orphans']} orphans "
+            f"({stats['orphan_bytes'] / 1024**2:.1f} MB), deleted {stats['deleted']}"
+        )
+    elif args.job == "tier-cold-media":
+        stats = asyncio.run(
+            tier_cold_media(args.after_days, args.storage_class, args.batch_size)
+        )
+        print(f"Moved {stats['moved']} originals, {stats['failed']} failed")
+    elif args.job == "expire-rate-limit-buckets":
+        expired = asyncio.run(expire_rate_limit_buckets(args.idle_seconds))
+        print(f"Deleted {expired} idle rate limit buckets")
+
+
+if __name__ == "__main__":
+    main()
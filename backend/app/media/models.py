@@ -1,4 +1,5 @@
 import uuid
+from datetime import datetime
 from enum import Enum
 from typing import TYPE_CHECKING, Optional
 
@@ -6,7 +7,7 @@ import sqlalchemy as sa
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.core.database import TimestampedBase
+from app.core.database import Base, TimestampedBase
 
 if TYPE_CHECKING:
     from app.auth.models import User
@@ -29,34 +30,163 @@ class Media(TimestampedBase):
         COMPLETED = "completed"
         FAILED = "failed"
 
+    class StorageTier(str, Enum):
+        """S3 storage class of the original."""
+
+        STANDARD = "STANDARD"
+        STANDARD_IA = "STANDARD_IA"
+        GLACIER_IR = "GLACIER_IR"
+        GLACIER = "GLACIER"
+        DEEP_ARCHIVE = "DEEP_ARCHIVE"
+
+        @property
+        def requires_restore(self) -> bool:
+            """Objects in archive classes can't be read until restored."""
+            return self in (Media.StorageTier.GLACIER, Media.StorageTier.DEEP_ARCHIVE)
+
     __tablename__ = "media"
+    # Hash partitioned by user, with the partitions created by the migration.
+    # Unique constraints must include user_id, and indexes lead with it to
+    # match the filters of `MediaService.list`.
+    __table_args__ = (
+        sa.UniqueConstraint("user_id", "s3_key", name="media_user_id_s3_key_key"),
+        sa.Index("media_user_id_created_at_idx", "user_id", sa.text("created_at DESC")),
+        sa.Index(
+            "media_user_id_media_type_created_at_idx",
+            "user_id",
+            "media_type",
+            sa.text("created_at DESC"),
+        ),
+        sa.Index(
+            "media_user_id_status_created_at_idx",
+            "user_id",
+            "status",
+            sa.text("created_at DESC"),
+        ),
+        sa.Index(
+            "media_user_id_is_favorite_created_at_idx",
+            "user_id",
+            "is_favorite",
+            sa.text("created_at DESC"),
+        ),
+        # Work queue of the processing worker, across all users
+        sa.Index(
+            "media_unfinished_created_at_idx",
+            "created_at",
+            postgresql_where=sa.text("status IN ('PENDING', 'PROCESSING')"),
+        ),
+        {"postgresql_partition_by": "HASH (user_id)"},
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
     )
 
-    # User relationship
+    # User relationship, part of the primary key as the partition key
     user_id: Mapped[uuid.UUID] = mapped_column(
-        sa.ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True
+        sa.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
     )
     user: Mapped["User"] = relationship("User", back_populates="media")
 
     # Media properties
-    media_type: Mapped[Type] = mapped_column(sa.Enum(Type), nullable=False, index=True)
+    media_type: Mapped[Type] = mapped_column(sa.Enum(Type), nullable=False)
     status: Mapped[Status] = mapped_column(
-        sa.Enum(Status), default=Status.PENDING, nullable=False, index=True
+        sa.Enum(Status), default=Status.PENDING, nullable=False
     )
 
     # S3 storage
-    s3_key: Mapped[str] = mapped_column(sa.String(500), nullable=False, unique=True)
+    s3_key: Mapped[str] = mapped_column(sa.String(500), nullable=False)
     s3_bucket: Mapped[str] = mapped_column(sa.String(255), nullable=False)
     original_filename: Mapped[str] = mapped_column(sa.String(500), nullable=False)
 
     # File metadata
-    file_size: Mapped[int] = mapped_column(sa.Integer, nullable=False)
+    file_size: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
     mime_type: Mapped[str] = mapped_column(sa.String(100), nullable=False)
 
     # User metadata
     user_tags: Mapped[Optional[list[str]]] = mapped_column(sa.JSON, nullable=True)
     description: Mapped[Optional[str]] = mapped_column(sa.Text, nullable=True)
     is_favorite: Mapped[bool] = mapped_column(sa.Boolean, default=False, nullable=False)
+
+    # Derived files, set by the processing worker
+    poster_key: Mapped[Optional[str]] = mapped_column(sa.String(500), nullable=True)
+    playlist_key: Mapped[Optional[str]] = mapped_column(sa.String(500), nullable=True)
+    web_key: Mapped[Optional[str]] = mapped_column(sa.String(500), nullable=True)
+    blurhash: Mapped[Optional[str]] = mapped_column(sa.String(64), nullable=True)
+
+    # Storage tiering; derived files always stay in STANDARD
+    storage_tier: Mapped[StorageTier] = mapped_column(
+        sa.Enum(StorageTier, name="media_storage_tier"),
+        default=StorageTier.STANDARD,
+        server_default=StorageTier.STANDARD.name,
+        nullable=False,
+    )
+    # Sampled, see app.media.access; NULL until the first download
+    last_accessed_at: Mapped[Optional[datetime]] = mapped_column(
+        sa.DateTime(timezone=True), nullable=True
+    )
+
+
+class MediaLibrary(Base):
+    """Per-user media library state."""
+
+    __tablename__ = "media_library"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        sa.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    # Incremented on every change to the user's media, used for list ETags
+    version: Mapped[int] = mapped_column(
+        sa.BigInteger, default=0, server_default=sa.text("0"), nullable=False
+    )
+
+    # Storage usage ledger, updated in the same transaction as media rows
+    image_count: Mapped[int] = mapped_column(
+        sa.BigInteger, default=0, server_default=sa.text("0"), nullable=False
+    )
+    image_bytes: Mapped[int] = mapped_column(
+        sa.BigInteger, default=0, server_default=sa.text("0"), nullable=False
+    )
+    video_count: Mapped[int] = mapped_column(
+        sa.BigInteger, default=0, server_default=sa.text("0"), nullable=False
+    )
+    video_bytes: Mapped[int] = mapped_column(
+        sa.BigInteger, default=0, server_default=sa.text("0"), nullable=False
+    )
+
+    @staticmethod
+    def usage_delta(media_type: Media.Type, file_size: int) -> dict[str, int]:
+        """Ledger column increments for adding one media item."""
+        return {
+            f"{media_type.value}_count": 1,
+            f"{media_type.value}_bytes": file_size,
+        }
+
+
+class MediaChange(Base):
+    """Latest change per media item, used for delta sync.
+
+    `seq` is the library version of the transaction that made the change, so
+    it grows monotonically per user in commit order. Deleted media keep a
+    tombstone row.
+    """
+
+    class Op(str, Enum):
+        """Change operation enum."""
+
+        CREATED = "created"
+        UPDATED = "updated"
+        DELETED = "deleted"
+
+    __tablename__ = "media_change"
+    __table_args__ = (
+        sa.Index("media_change_user_id_seq_idx", "user_id", "seq", "media_id"),
+    )
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        sa.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    media_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    seq: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+    op: Mapped[Op] = mapped_column(sa.Enum(Op, name="media_change_op"), nullable=False)
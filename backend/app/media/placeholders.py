@@ -0,0 +1,144 @@
+"""Blurhash placeholders, painted by clients before the real image loads.
+
+Images are shrunk by libvips to a few dozen pixels, then encoded following
+https://github.com/woltapp/blurhash with a DCT vectorized in NumPy.
+"""
+
+import logging
+import math
+import os
+import tempfile
+
+import numpy as np
+
+from app.core.settings import settings
+from .tools import run_tool
+
+logger = logging.getLogger(__name__)
+
+# Components along x and y; 4x3 suits the common landscape aspect ratio
+COMPONENTS = (4, 3)
+
+# Pixels along the long side of the image the hash is computed from
+SAMPLE_SIZE = 32
+
+BASE83 = (
+    "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    "abcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+)
+
+
+def _base83(value: int, length: int) -> str:
+    return "".join(
+        BASE83[value // 83 ** (length - i) % 83] for i in range(1, length + 1)
+    )
+
+
+def _linear_to_srgb(value: float) -> int:
+    v = max(0.0, min(1.0, value))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value: float, exponent: float) -> float:
+    return math.copysign(abs(value) ** exponent, value)
+
+
+def read_pnm(data: bytes) -> tuple[int, int, int, bytes]:
+    """Parse a binary PPM or PGM into width, height, channels and pixels."""
+    fields: list[bytes] = []
+    pos = 0
+    while len(fields) < 4:
+        if data[pos : pos + 1].isspace():
+            pos += 1
+        elif data[pos : pos + 1] == b"#":
+            pos = data.index(b"\n", pos) + 1
+        else:
+            end = pos
+            while not data[end : end + 1].isspace():
+                end += 1
+            fields.append(data[pos:end])
+            pos = end
+
+    magic, width, height, maxval = fields
+    channels = {b"P6": 3, b"P5": 1}.get(magic)
+    if channels is None or maxval != b"255":
+        raise ValueError(f"Unsupported PNM: {magic!r}, maxval {maxval!r}")
+    # A single whitespace separates the header from the pixels
+    return int(width), int(height), channels, data[pos + 1 :]
+
+
+def _factors(
+    width: int, height: int, channels: int, pixels: bytes, nx: int, ny: int
+) -> list[tuple[float, float, float]]:
+    image = np.frombuffer(pixels, np.uint8, width * height * channels)
+    image = image.reshape(height, width, channels)
+    if channels == 1:
+        image = np.repeat(image, 3, axis=2)
+    v = image / 255
+    linear = np.where(v <= 0.04045, v / 12.92, ((v + 0.055) / 1.055) ** 2.4)
+
+    cos_y = np.cos(np.pi * np.outer(np.arange(ny), np.arange(height)) / height)
+    cos_x = np.cos(np.pi * np.outer(np.arange(nx), np.arange(width)) / width)
+    factors = np.einsum("jy,ix,yxc->jic", cos_y, cos_x, linear)
+    factors *= 2 / (width * height)
+    factors[0, 0] /= 2  # The DC component is normalized by 1, not 2
+    return [tuple(f) for f in factors.reshape(-1, 3).tolist()]
+
+
+def encode_blurhash(
+    width: int, height: int, channels: int, pixels: bytes, components=COMPONENTS
+) -> str:
+    """Encode raw 8-bit gray or RGB pixels as a blurhash string."""
+    nx, ny = components
+    factors = _factors(width, height, channels, pixels, nx, ny)
+    dc, ac = factors[0], factors[1:]
+
+    result = _base83((nx - 1) + (ny - 1) * 9, 1)
+    if ac:
+        actual_max = max(abs(value) for factor in ac for value in factor)
+        quantized = max(0, min(82, math.floor(actual_max * 166 - 0.5)))
+        max_value = (quantized + 1) / 166
+        result += _base83(quantized, 1)
+    else:
+        max_value = 1.0
+        result += _base83(0, 1)
+
+    r, g, b = (_linear_to_srgb(value) for value in dc)
+    result += _base83((r << 16) + (g << 8) + b, 4)
+    for factor in ac:
+        r, g, b = (
+            max(0, min(18, math.floor(_sign_pow(value / max_value, 0.5) * 9 + 9.5)))
+            for value in factor
+        )
+        result += _base83(r * 19 * 19 + g * 19 + b, 2)
+    return result
+
+
+def compute_blurhash(path: str) -> str:
+    """Blurhash of a local image file, in any format libvips can read."""
+    vips = settings.vips_path
+    with tempfile.TemporaryDirectory(prefix="blurhash-") as workdir:
+        sample = os.path.join(workdir, "sample.v")
+        srgb = os.path.join(workdir, "srgb.v")
+        target = os.path.join(workdir, "sample.ppm")
+        run_tool([vips, "thumbnail", path, sample, str(SAMPLE_SIZE)])
+        # 16-bit, CMYK or float images would otherwise reach the PPM as is
+        run_tool([vips, "colourspace", sample, srgb, "srgb"])
+        run_tool([vips, "cast", srgb, target, "uchar"])
+        with open(target, "rb") as f:
+            return encode_blurhash(*read_pnm(f.read()))
+
+
+def try_compute_blurhash(path: str) -> str | None:
+    """Blurhash of a local image file, or None if it can't be computed.
+
+    Without a placeholder clients only miss the blurred preview, so failing
+    here must not fail processing.
+    """
+    try:
+        return compute_blurhash(path)
+    except Exception:
+        logger.exception("Computing the blurhash of %s failed", path)
+        return None
@@ -0,0 +1,250 @@
+"""Media processing worker.
+
+Claims pending media, runs the pipeline for its MIME type in that pipeline's
+process pool and records the outcome in `Media.status`. Media no pipeline
+handles are marked completed directly. Run with
+`python -m app.media.processing`.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from collections import defaultdict
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import Row, and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import async_session_maker
+from app.core.settings import settings
+from .conversion import process_image
+from .models import Media, MediaChange
+from .services import MediaService
+from .transcoding import transcode_video
+
+logger = logging.getLogger(__name__)
+
+
+class Pipeline:
+    """Processing for a set of MIME types, with its own bounded process pool.
+
+    Separate pools keep quick image conversions from queueing behind long
+    video transcodes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        mime_types: list[str],
+        processor: Callable[[str, str], dict[str, Any]],
+        workers: int,
+    ):
+        self.name = name
+        self.mime_types = mime_types
+        # Takes the original's S3 key and MIME type, returns the Media fields
+        # to set
+        self.processor = processor
+        self.workers = workers
+        self.running: set[asyncio.Task] = set()
+        self._pool: ProcessPoolExecutor | None = None
+
+    @property
+    def free(self) -> int:
+        return self.workers - len(self.running)
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned workers don't inherit the parent's connections or S3 client
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=100,
+            )
+        return self._pool
+
+    def shutdown(self) -> None:
+        for task in self.running:
+            task.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
+
+PIPELINES = [
+    Pipeline(
+        "video",
+        settings.allowed_video_types,
+        transcode_video,
+        settings.processing_workers,
+    ),
+    Pipeline(
+        "image",
+        settings.allowed_image_types,
+        process_image,
+        settings.image_processing_workers,
+    ),
+]
+
+PROCESSED_TYPES = [mime for pipeline in PIPELINES for mime in pipeline.mime_types]
+
+
+async def _record_updates(session: AsyncSession, rows: list[Row]) -> None:
+    """Bump library versions and log the status changes for delta sync."""
+    media_by_user: dict[UUID, list[UUID]] = defaultdict(list)
+    for row in rows:
+        media_by_user[row.user_id].append(row.id)
+    for user_id, media_ids in media_by_user.items():
+        version = await MediaService.bump_library_version(session, user_id)
+        await MediaService.record_changes(
+            session, user_id, version, media_ids, MediaChange.Op.UPDATED
+        )
+
+
+async def complete_unprocessed(limit: int = 500) -> int:
+    """Mark pending media that need no processing as completed."""
+    async with async_session_maker() as session:
+        candidates = (
+            select(Media.id)
+            .where(
+                Media.status == Media.Status.PENDING,
+                Media.mime_type.not_in(PROCESSED_TYPES),
+            )
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await session.execute(
+            update(Media)
+            .where(Media.id.in_(candidates.scalar_subquery()))
+            .values(status=Media.Status.COMPLETED)
+            .returning(Media.id, Media.user_id)
+        )
+        rows = result.all()
+        await _record_updates(session, rows)
+        await session.commit()
+        return len(rows)
+
+
+async def claim(mime_types: list[str], limit: int) -> list[Row]:
+    """Move up to `limit` media of the given types to PROCESSING, oldest first.
+
+    Media in PROCESSING whose heartbeat stopped for longer than the timeout,
+    e.g. after a worker crash, are claimed again.
+    """
+    stale = func.now() - timedelta(seconds=settings.processing_timeout_seconds)
+    async with async_session_maker() as session:
+        candidates = (
+            select(Media.id)
+            .where(
+                Media.mime_type.in_(mime_types),
+                or_(
+                    Media.status == Media.Status.PENDING,
+                    and_(
+                        Media.status == Media.Status.PROCESSING,
+                        Media.updated_at < stale,
+                    ),
+                ),
+            )
+            .order_by(Media.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await session.execute(
+            update(Media)
+            .where(Media.id.in_(candidates.scalar_subquery()))
+            .values(status=Media.Status.PROCESSING)
+            .returning(Media.id, Media.user_id, Media.s3_key, Media.mime_type)
+        )
+        rows = result.all()
+        await _record_updates(session, rows)
+        await session.commit()
+        return rows
+
+
+async def finish(row: Row, status: Media.Status, fields: dict[str, Any]) -> None:
+    """Record the outcome of a job, unless the media was deleted meanwhile."""
+    async with async_session_maker() as session:
+        result = await session.execute(
+            update(Media)
+            .where(
+                Media.user_id == row.user_id,
+                Media.id == row.id,
+                Media.status == Media.Status.PROCESSING,
+            )
+            .values(status=status, **fields)
+            .returning(Media.id, Media.user_id)
+        )
+        rows = result.all()
+        await _record_updates(session, rows)
+        await session.commit()
+
+
+async def heartbeat(row: Row) -> None:
+    """Refresh `updated_at` of a running job, so it is not claimed again.
+
+    A job runs several ffmpeg steps, each up to `transcode_timeout_seconds`,
+    so no fixed timeout would cover it.
+    """
+    while True:
+        await asyncio.sleep(settings.processing_heartbeat_seconds)
+        try:
+            async with async_session_maker() as session:
+                await session.execute(
+                    update(Media)
+                    .where(
+                        Media.user_id == row.user_id,
+                        Media.id == row.id,
+                        Media.status == Media.Status.PROCESSING,
+                    )
+                    .values(updated_at=func.now())
+                )
+                await session.commit()
+        except Exception:
+            logger.exception("Heartbeat of %s failed", row.id)
+
+
+async def process(pipeline: Pipeline, row: Row) -> None:
+    loop = asyncio.get_running_loop()
+    beat = asyncio.create_task(heartbeat(row))
+    try:
+        fields = await loop.run_in_executor(
+            pipeline.pool, pipeline.processor, row.s3_key, row.mime_type
+        )
+    except Exception:
+        logger.exception("Processing %s %s failed", pipeline.name, row.id)
+        await finish(row, Media.Status.FAILED, {})
+    else:
+        await finish(row, Media.Status.COMPLETED, fields)
+    finally:
+        beat.cancel()
+
+
+async def run_worker() -> None:
+    """Claim and process media until cancelled."""
+    try:
+        while True:
+            await complete_unprocessed()
+
+            claimed = 0
+            for pipeline in PIPELINES:
+                if pipeline.free <= 0:
+                    continue
+                for row in await claim(pipeline.mime_types, pipeline.free):
+                    task = asyncio.create_task(process(pipeline, row))
+                    pipeline.running.add(task)
+                    task.add_done_callback(pipeline.running.discard)
+                    claimed += 1
+
+            if not claimed:
+                await asyncio.sleep(settings.processing_poll_seconds)
+    finally:
+        for pipeline in PIPELINES:
+            pipeline.shutdown()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=settings.log_level)
+    asyncio.run(run_worker())
@@ -1,20 +1,44 @@
-from fastapi import APIRouter, Depends, Query, Response, status
+import time
+from typing import Literal
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.dependencies import current_active_verified_user
 from app.auth.models import User
-from app.core.database import get_async_session
+from app.core.conditional import (
+    CACHE_CONTROL,
+    VARY,
+    etag_matches,
+    not_modified,
+    timestamp_etag,
+    weak_etag,
+)
+from app.core.database import get_async_session, pin_reads_to_primary
+from app.core.query_budget import query_budget
+from app.core.rate_limit import RateLimit, rate_limiter
+from app.core.settings import settings
 from .models import Media
 
+from .access import access_tracker
+from .delivery import delivery
+from .events import status_events
+from .exceptions import EventStreamLimitReached
 from .services import MediaService
-from .dependencies import get_media_by_id
+from .variants import image_variants
+from .dependencies import get_media_by_id, get_read_session, get_readable_media_by_id
+from .constants import IMAGE_VARIANT_SIZES, MAX_SYNC_CHANGES
 from .schemas import (
     BatchConfirmRequest,
     BatchConfirmResponse,
     BatchUploadRequest,
     BatchUploadResponse,
     DownloadUrlResponse,
+    MediaChangeList,
     MediaList,
     MediaRead,
     MediaUpdate,
@@ -22,81 +46,253 @@ from .schemas import (
 
 router = APIRouter()
 
+upload_urls_limit = RateLimit(
+    "upload_urls",
+    capacity=settings.rate_limit_upload_urls_burst,
+    per_minute=settings.rate_limit_upload_urls_per_minute,
+)
+
+
+def set_delivery_cookies(response: Response, user_id: UUID) -> None:
+    """Attach signed CDN cookies, if the delivery backend uses them."""
+    signed = delivery.cookies(user_id)
+    if signed is None:
+        return
+
+    cookies, expires = signed
+    for name, value in cookies.items():
+        response.set_cookie(
+            name,
+            value,
+            max_age=expires - int(time.time()),
+            domain=settings.cdn_cookie_domain,
+            secure=True,
+            httponly=True,
+            samesite="lax",
+        )
+
 
 @router.post("/upload/urls", response_model=BatchUploadResponse)
-def get_upload_urls(
+@query_budget(4)
+async def get_upload_urls(
     request: BatchUploadRequest,
+    session: AsyncSession = Depends(get_async_session),
     user: User = Depends(current_active_verified_user),
 ):
     """Generate presigned URLs for uploading files."""
-    return MediaService.generate_upload_urls(user, request)
+    # Each URL costs one token, so large batches drain the bucket faster
+    await rate_limiter.hit(upload_urls_limit, str(user.id), len(request.files))
+    # Early check against the primary's ledger; confirm_uploads enforces it
+    requested = sum(file.file_size for file in request.files)
+    await MediaService.check_storage_quota(session, user.id, requested)
+    # Signing is CPU-bound, keep it off the event loop
+    return await run_in_threadpool(MediaService.generate_upload_urls, user, request)
 
 
 @router.post("/upload/confirm", response_model=BatchConfirmResponse)
+@query_budget(6)
 async def confirm_uploads(
     request: BatchConfirmRequest,
+    response: Response,
     session: AsyncSession = Depends(get_async_session),
     user: User = Depends(current_active_verified_user),
 ):
     """Confirm uploads after files are uploaded to S3."""
-    return await MediaService.confirm_uploads(session, user, request)
+    confirmed = await MediaService.confirm_uploads(session, user, request)
+    pin_reads_to_primary(response)
+    return confirmed
 
 
 @router.get("/{media_id}/download-url", response_model=DownloadUrlResponse)
+@query_budget(3)
 async def get_download_url(
-    media: Media = Depends(get_media_by_id),
+    response: Response,
+    variant: Literal["web", "original", "poster"] = "web",
+    media: Media = Depends(get_readable_media_by_id),
 ):
     """Get download URL for media."""
-    return MediaService.get_download_url(media)
+    if media.storage_tier.requires_restore:
+        # Checking the restore status is a blocking S3 call
+        download = await run_in_threadpool(
+            MediaService.get_download_url, media, variant
+        )
+    else:
+        download = MediaService.get_download_url(media, variant)
+    access_tracker.record(media.user_id, media.id)
+    set_delivery_cookies(response, media.user_id)
+    return download
+
+
+@router.get("/{media_id}/image", response_class=Response)
+@query_budget(3)
+async def get_image_variant(
+    request: Request,
+    w: int | None = Query(None, ge=1, le=IMAGE_VARIANT_SIZES[-1]),
+    h: int | None = Query(None, ge=1, le=IMAGE_VARIANT_SIZES[-1]),
+    fit: Literal["cover", "contain"] = "contain",
+    format: Literal["jpeg", "webp", "png"] = "jpeg",
+    media: Media = Depends(get_readable_media_by_id),
+):
+    """Get the image, or a video's poster, resized to fit the given box.
+
+    Sizes are rounded up to fixed steps, the image is never upscaled.
+    """
+    variant = image_variants.variant(media, w, h, fit, format)
+    etag = weak_etag(variant.key)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    data = await image_variants.load(variant)
+    return Response(
+        content=data,
+        media_type=variant.content_type,
+        headers={"ETag": etag, "Cache-Control": "private, max-age=86400"},
+    )
+
+
+@router.get("/{media_id}/hls/{name}.m3u8", response_class=PlainTextResponse)
+@query_budget(3)
+async def get_hls_playlist(
+    name: str,
+    media: Media = Depends(get_readable_media_by_id),
+):
+    """Get an HLS playlist for a processed video."""
+    playlist = await run_in_threadpool(MediaService.get_hls_playlist, media, name)
+    response = PlainTextResponse(
+        playlist,
+        media_type="application/vnd.apple.mpegurl",
+        headers={"Cache-Control": "private, max-age=300"},
+    )
+    set_delivery_cookies(response, media.user_id)
+    return response
 
 
 @router.get("", response_model=MediaList)
+@query_budget(5)
 async def list_media(
+    request: Request,
     media_type: Media.Type | None = Query(None),
     status: Media.Status | None = Query(None),
     is_favorite: bool | None = Query(None),
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=100),
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_read_session),
     user: User = Depends(current_active_verified_user),
 ):
     """List user's media with filters."""
-    items, total = await MediaService.list(
+    # Read the version before the rows, so a concurrent write can only make
+    # the ETag older than the body and never newer
+    version = await MediaService.get_library_version(session, user.id)
+    # Versions are per user, so scope the ETag to the user
+    etag = weak_etag(f"{user.id}:{version}")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    rows, total = await MediaService.list(
         session, user.id, media_type, status, is_favorite, page, size
     )
-    pages = (total + size - 1) // size if total else 0
-
-    return MediaList(
-        items=[MediaRead.model_validate(m) for m in items],
-        total=total,
-        page=page,
-        size=size,
-        pages=pages,
+
+    # Rows come straight from the database, so skip response_model validation
+    media_list = MediaList.from_rows(rows, total, page, size)
+    return Response(
+        content=media_list.to_json_bytes(),
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": VARY},
+    )
+
+
+@router.get("/changes", response_model=MediaChangeList)
+@query_budget(3)
+async def list_media_changes(
+    since: str = Query("0"),
+    limit: int = Query(500, ge=1, le=MAX_SYNC_CHANGES),
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_active_verified_user),
+):
+    """List media created, updated or deleted since a sync token."""
+    changes = await MediaService.list_changes(session, user.id, since, limit)
+    return Response(content=changes.model_dump_json(), media_type="application/json")
+
+
+@router.get("/events", response_class=StreamingResponse)
+@query_budget(2)
+async def stream_media_events(
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_verified_user),
+):
+    """Stream media status changes as Server-Sent Events."""
+    # Reject with 429 while the response can still carry it
+    status_events.check_capacity(user.id)
+    # Release the connection used for authentication, the stream is long-lived
+    await session.close()
+
+    async def stream():
+        # Subscribed only once streaming starts, so a response that is never
+        # started cannot leak the subscription
+        try:
+            subscription = status_events.subscribe(user.id)
+        except EventStreamLimitReached:
+            # Another stream took the last slot since the check
+            return
+        try:
+            async for event in status_events.stream(subscription):
+                yield event
+        finally:
+            status_events.unsubscribe(user.id, subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
 @router.get("/{media_id}", response_model=MediaRead)
-async def get_media(media: Media = Depends(get_media_by_id)):
+@query_budget(4)
+async def get_media(
+    media_id: UUID,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_active_verified_user),
+):
     """Get single media by ID."""
+    if request.headers.get("if-none-match"):
+        updated_at = await MediaService.get_updated_at(session, media_id, user.id)
+        etag = timestamp_etag(updated_at)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+    media = await MediaService.get(session, media_id, user.id)
+    response.headers["ETag"] = timestamp_etag(media.updated_at)
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    response.headers["Vary"] = VARY
     return MediaRead.model_validate(media)
 
 
 @router.patch("/{media_id}", response_model=MediaRead)
+@query_budget(7)
 async def update_media(
     data: MediaUpdate,
+    response: Response,
     media: Media = Depends(get_media_by_id),
     session: AsyncSession = Depends(get_async_session),
 ):
     """Update media metadata."""
     updated = await MediaService.update(session, media, data)
+    pin_reads_to_primary(response)
+    response.headers["ETag"] = timestamp_etag(updated.updated_at)
     return MediaRead.model_validate(updated)
 
 
 @router.delete("/{media_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(6)
 async def delete_media(
     media: Media = Depends(get_media_by_id),
     session: AsyncSession = Depends(get_async_session),
 ):
     """Delete media."""
     await MediaService.delete(session, media)
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
+    response = Response(status_code=status.HTTP_204_NO_CONTENT)
+    pin_reads_to_primary(response)
+    return response
@@ -1,11 +1,12 @@
 import uuid
+from collections.abc import Mapping
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
 from pydantic import BaseModel, Field
 
 
-from .models import Media
+from .models import Media, MediaChange
 from .constants import MAX_MEDIA_UPLOADS_NUM
 
 
@@ -94,6 +95,10 @@ class MediaRead(BaseModel):
     user_tags: Optional[list[str]] = None
     description: Optional[str] = None
     is_favorite: bool
+    poster_key: Optional[str] = None
+    playlist_key: Optional[str] = None
+    web_key: Optional[str] = None
+    blurhash: Optional[str] = None  # Placeholder to paint until the image loads
     created_at: datetime
     updated_at: datetime
 
@@ -108,3 +113,37 @@ class MediaList(BaseModel):
     page: int
     size: int
     pages: int
+
+    @classmethod
+    def from_rows(
+        cls, rows: list[Mapping[str, Any]], total: int, page: int, size: int
+    ) -> "MediaList":
+        """Build from trusted database rows without re-validating them."""
+        return cls.model_construct(
+            items=[MediaRead.model_construct(**row) for row in rows],
+            total=total,
+            page=page,
+            size=size,
+            pages=(total + size - 1) // size if total else 0,
+        )
+
+    def to_json_bytes(self) -> bytes:
+        """Serialize straight to JSON bytes with pydantic-core."""
+        return self.__pydantic_serializer__.to_json(self)
+
+
+# Delta sync
+class MediaChangeRead(BaseModel):
+    """Single change since the sync token."""
+
+    media_id: uuid.UUID
+    op: MediaChange.Op
+    media: Optional[MediaRead] = None  # None for deletions
+
+
+class MediaChangeList(BaseModel):
+    """Changes since the sync token, oldest first."""
+
+    changes: list[MediaChangeRead]
+    next_since: str
+    has_more: bool
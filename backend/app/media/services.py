@@ -1,23 +1,54 @@
-from uuid import UUID
+from collections import Counter
+from collections.abc import Mapping, Sequence
+from datetime import datetime
+from uuid import UUID, uuid4
 
-from sqlalchemy import func, select
+from sqlalchemy import and_, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import RowMapping
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.settings import settings
 from app.core.aws.s3 import s3_service
 from app.auth.models import User
-from .exceptions import FileTooLarge, MediaNotFound, UnsupportedMediaType
-from .models import Media
+from .constants import HLS_RENDITIONS
+from .delivery import delivery
+from .exceptions import (
+    FileTooLarge,
+    InvalidSyncToken,
+    MediaNotFound,
+    MediaRestoring,
+    StorageQuotaExceeded,
+    UnsupportedMediaType,
+)
+from .models import Media, MediaChange, MediaLibrary
 from .schemas import (
     BatchConfirmRequest,
     BatchConfirmResponse,
     BatchUploadRequest,
     BatchUploadResponse,
     DownloadUrlResponse,
+    MediaChangeList,
+    MediaChangeRead,
+    MediaRead,
     MediaUpdate,
     UploadResponse,
 )
 
+# Columns needed to render MediaRead, selected instead of full ORM entities
+MEDIA_READ_COLUMNS = [getattr(Media, name) for name in MediaRead.model_fields]
+
+MAX_UUID = UUID(int=(1 << 128) - 1)
+
+
+def parse_sync_token(token: str) -> tuple[int, UUID]:
+    """Parse `seq` or `seq:media_id` into a cursor for delta sync."""
+    try:
+        seq, _, media_id = token.partition(":")
+        return int(seq), UUID(media_id) if media_id else MAX_UUID
+    except ValueError:
+        raise InvalidSyncToken(token)
+
 
 def get_media_type(content_type: str) -> Media.Type:
     """Determine media type from MIME type."""
@@ -60,45 +91,169 @@ class MediaService:
 
         return BatchUploadResponse(uploads=uploads)
 
+    @staticmethod
+    async def check_storage_quota(
+        session: AsyncSession, user_id: UUID, requested: int, lock: bool = False
+    ) -> None:
+        """Ensure `requested` more bytes fit in the user's storage quota.
+
+        With `lock`, the ledger row stays locked until the transaction ends,
+        so concurrent batches are checked one after another against the usage
+        each of them leaves behind.
+        """
+        if not settings.storage_quota_mb:
+            return
+
+        used_bytes = MediaLibrary.image_bytes + MediaLibrary.video_bytes
+        if lock:
+            # A no-op upsert creates the ledger if needed and locks it in one
+            # statement, so first uploads of a new user are serialized too
+            result = await session.execute(
+                insert(MediaLibrary)
+                .values(user_id=user_id)
+                .on_conflict_do_update(
+                    index_elements=[MediaLibrary.user_id],
+                    set_={"version": MediaLibrary.version},
+                )
+                .returning(used_bytes)
+            )
+        else:
+            result = await session.execute(
+                select(used_bytes).where(MediaLibrary.user_id == user_id)
+            )
+        used = result.scalar_one_or_none() or 0
+        if used + requested > settings.storage_quota_mb * 1024 * 1024:
+            raise StorageQuotaExceeded(settings.storage_quota_mb)
+
     @staticmethod
     async def confirm_uploads(
         session: AsyncSession, user: User, request: BatchConfirmRequest
     ) -> BatchConfirmResponse:
         """Confirm uploads and create media records."""
-        media_ids: list[UUID] = []
-        failed = 0
-
+        rows = []
         for file in request.files:
+            # Keys are unique per user only, so only accept the user's own
+            if s3_service.key_user_id(file.key) != user.id:
+                continue
             try:
-                media = Media(
-                    user_id=user.id,
-                    media_type=get_media_type(file.content_type),
-                    status=Media.Status.PENDING,
-                    s3_key=file.key,
-                    s3_bucket=settings.s3_bucket_name,
-                    original_filename=file.original_filename,
-                    file_size=file.file_size,
-                    mime_type=file.content_type,
-                )
-                session.add(media)
-                await session.flush()
-                media_ids.append(media.id)
-            except Exception:
-                failed += 1
+                media_type = get_media_type(file.content_type)
+            except UnsupportedMediaType:
+                continue
+            rows.append(
+                {
+                    "id": uuid4(),
+                    "user_id": user.id,
+                    "media_type": media_type,
+                    "status": Media.Status.PENDING,
+                    "s3_key": file.key,
+                    "s3_bucket": settings.s3_bucket_name,
+                    "original_filename": file.original_filename,
+                    "file_size": file.file_size,
+                    "mime_type": file.content_type,
+                    "is_favorite": False,
+                }
+            )
+
+        # One multi-row INSERT for the whole batch; keys that were already
+        # confirmed are skipped and reported as failed
+        media_ids: list[UUID] = []
+        usage: Counter[str] = Counter()
+        if rows:
+            # Checked again here, in the transaction that updates the ledger,
+            # since batches may have been confirmed since their URLs were issued
+            await MediaService.check_storage_quota(
+                session, user.id, sum(row["file_size"] for row in rows), lock=True
+            )
+            result = await session.execute(
+                insert(Media)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=[Media.user_id, Media.s3_key])
+                .returning(Media.id, Media.media_type, Media.file_size)
+            )
+            for media_id, media_type, file_size in result:
+                media_ids.append(media_id)
+                usage.update(MediaLibrary.usage_delta(media_type, file_size))
+        failed = len(request.files) - len(media_ids)
 
+        if media_ids:
+            version = await MediaService.bump_library_version(session, user.id, usage)
+            await MediaService.record_changes(
+                session, user.id, version, media_ids, MediaChange.Op.CREATED
+            )
         await session.commit()
         return BatchConfirmResponse(
             created=len(media_ids), failed=failed, media_ids=media_ids
         )
 
     @staticmethod
-    def get_download_url(media: Media, expires_in: int = 3600) -> DownloadUrlResponse:
-        """Get download URL for media."""
-        url = s3_service.create_presigned_download_url(
-            media.s3_key, filename=media.original_filename
-        )
+    def get_download_url(
+        media: Media, variant: str = "web", expires_in: int = 3600
+    ) -> DownloadUrlResponse:
+        """Get download URL for media or one of its derived files.
+
+        The `web` variant is the browser-friendly derivative when one exists,
+        e.g. a JPEG for HEIC photos, and the original otherwise. Originals in
+        archive storage are restored first, see `ensure_restored`. URLs point
+        at S3 or the CDN, depending on the delivery backend.
+        """
+        if variant == "poster":
+            if media.poster_key is None:
+                raise MediaNotFound(media.id)
+            url = delivery.download_url(media.poster_key)
+        elif variant == "web" and media.web_key is not None:
+            stem = media.original_filename.rsplit(".", 1)[0]
+            url = delivery.download_url(media.web_key, filename=f"{stem}.jpg")
+        else:
+            MediaService.ensure_restored(media)
+            url = delivery.download_url(media.s3_key, filename=media.original_filename)
         return DownloadUrlResponse(url=url, expires_in=expires_in)
 
+    @staticmethod
+    def ensure_restored(media: Media) -> None:
+        """Raise MediaRestoring unless the original can be downloaded now.
+
+        The first request for an archived original starts the restore; S3
+        keeps the restored copy for `restore_days`.
+        """
+        if not media.storage_tier.requires_restore:
+            return
+
+        head = s3_service.head_object(media.s3_key)
+        if head is None:
+            raise MediaNotFound(media.id)
+        if head["restore"] is None:
+            s3_service.restore_object(
+                media.s3_key, settings.restore_days, settings.restore_tier
+            )
+        elif 'ongoing-request="false"' in head["restore"]:
+            return
+        raise MediaRestoring(settings.restore_retry_after_seconds)
+
+    @staticmethod
+    def get_hls_playlist(media: Media, name: str) -> str:
+        """Get an HLS playlist with segment URIs for direct download.
+
+        The master playlist is returned as stored, its variant URIs resolve
+        back to this endpoint.
+        """
+        names = {"master", *(rendition[0] for rendition in HLS_RENDITIONS)}
+        if media.playlist_key is None or name not in names:
+            raise MediaNotFound(media.id)
+
+        hls_prefix = media.playlist_key.rsplit("/", 1)[0]
+        playlist = s3_service.get_object(f"{hls_prefix}/{name}.m3u8")
+        if playlist is None:
+            raise MediaNotFound(media.id)
+        if name == "master":
+            return playlist.decode()
+
+        lines = []
+        for line in playlist.decode().splitlines():
+            if line and not line.startswith("#"):
+                line = delivery.download_url(f"{hls_prefix}/{line}")
+            lines.append(line)
+        return "\n".join(lines) + "\n"
+
     @staticmethod
     async def list(
         session: AsyncSession,
@@ -108,9 +263,9 @@ class MediaService:
         is_favorite: bool | None = None,
         page: int = 1,
         size: int = 20,
-    ) -> tuple[list[Media], int]:
-        """List media for a user with filters."""
-        query = select(Media).where(Media.user_id == user_id)
+    ) -> tuple[list[RowMapping], int]:
+        """List media rows for a user with filters."""
+        query = select(*MEDIA_READ_COLUMNS).where(Media.user_id == user_id)
 
         if media_type:
             query = query.where(Media.media_type == media_type)
@@ -131,7 +286,7 @@ class MediaService:
         )
 
         result = await session.execute(query)
-        return list(result.scalars().all()), total
+        return list(result.mappings().all()), total
 
     @staticmethod
     async def get(session: AsyncSession, media_id: UUID, user_id: UUID) -> Media:
@@ -144,11 +299,136 @@ class MediaService:
             raise MediaNotFound(media_id)
         return media
 
+    @staticmethod
+    async def get_updated_at(
+        session: AsyncSession, media_id: UUID, user_id: UUID
+    ) -> datetime:
+        """Get only the last modification time of a media for user."""
+        result = await session.execute(
+            select(Media.updated_at).where(
+                Media.id == media_id, Media.user_id == user_id
+            )
+        )
+        updated_at = result.scalar_one_or_none()
+        if updated_at is None:
+            raise MediaNotFound(media_id)
+        return updated_at
+
+    @staticmethod
+    async def get_library_version(session: AsyncSession, user_id: UUID) -> int:
+        """Get the version of a user's media library."""
+        result = await session.execute(
+            select(MediaLibrary.version).where(MediaLibrary.user_id == user_id)
+        )
+        return result.scalar_one_or_none() or 0
+
+    @staticmethod
+    async def bump_library_version(
+        session: AsyncSession, user_id: UUID, usage: Mapping[str, int] | None = None
+    ) -> int:
+        """Increment the library version and apply usage ledger deltas.
+
+        Runs in the current transaction, so the ledger commits or rolls back
+        together with the media rows it describes.
+        """
+        usage = usage or {}
+        stmt = (
+            insert(MediaLibrary)
+            .values(user_id=user_id, version=1, **usage)
+            .on_conflict_do_update(
+                index_elements=[MediaLibrary.user_id],
+                set_={
+                    "version": MediaLibrary.version + 1,
+                    **{
+                        name: getattr(MediaLibrary, name) + delta
+                        for name, delta in usage.items()
+                    },
+                },
+            )
+            .returning(MediaLibrary.version)
+        )
+        result = await session.execute(stmt)
+        return result.scalar_one()
+
+    @staticmethod
+    async def record_changes(
+        session: AsyncSession,
+        user_id: UUID,
+        version: int,
+        media_ids: Sequence[UUID],
+        op: MediaChange.Op,
+    ) -> None:
+        """Record the latest change for each media in the sync change log."""
+        if not media_ids:
+            return
+
+        stmt = insert(MediaChange).values(
+            [
+                {"user_id": user_id, "media_id": media_id, "seq": version, "op": op}
+                for media_id in media_ids
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MediaChange.user_id, MediaChange.media_id],
+            set_={"seq": stmt.excluded.seq, "op": stmt.excluded.op},
+        )
+        await session.execute(stmt)
+
+    @staticmethod
+    async def list_changes(
+        session: AsyncSession, user_id: UUID, since: str, limit: int
+    ) -> MediaChangeList:
+        """List media changes after the sync token, using the change log index."""
+        seq, media_id = parse_sync_token(since)
+        query = (
+            select(MediaChange.seq, MediaChange.media_id, MediaChange.op)
+            .add_columns(*MEDIA_READ_COLUMNS)
+            .outerjoin(
+                Media,
+                and_(
+                    Media.user_id == MediaChange.user_id,
+                    Media.id == MediaChange.media_id,
+                ),
+            )
+            .where(
+                MediaChange.user_id == user_id,
+                tuple_(MediaChange.seq, MediaChange.media_id) > (seq, media_id),
+            )
+            .order_by(MediaChange.seq, MediaChange.media_id)
+            .limit(limit + 1)
+        )
+        rows = (await session.execute(query)).mappings().all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        changes = [
+            MediaChangeRead.model_construct(
+                media_id=row["media_id"],
+                op=row["op"],
+                media=(
+                    MediaRead.model_construct(
+                        **{name: row[name] for name in MediaRead.model_fields}
+                    )
+                    if row["id"] is not None
+                    else None
+                ),
+            )
+            for row in rows
+        ]
+        next_since = f"{rows[-1]['seq']}:{rows[-1]['media_id']}" if rows else since
+        return MediaChangeList.model_construct(
+            changes=changes, next_since=next_since, has_more=has_more
+        )
+
     @staticmethod
     async def update(session: AsyncSession, media: Media, data: MediaUpdate) -> Media:
         """Update media metadata."""
         for field, value in data.model_dump(exclude_unset=True).items():
             setattr(media, field, value)
+        version = await MediaService.bump_library_version(session, media.user_id)
+        await MediaService.record_changes(
+            session, media.user_id, version, [media.id], MediaChange.Op.UPDATED
+        )
         await session.commit()
         await session.refresh(media)
         return media
@@ -157,5 +437,14 @@ class MediaService:
     async def delete(session: AsyncSession, media: Media) -> None:
         """Delete media and S3 object."""
         s3_service.delete_object(media.s3_key)
+        # Derived files: renditions, conversions and cached image variants
+        s3_service.delete_prefix(s3_service.derived_prefix(media.s3_key) + "/")
         await session.delete(media)
+        usage = MediaLibrary.usage_delta(media.media_type, media.file_size)
+        version = await MediaService.bump_library_version(
+            session, media.user_id, {name: -delta for name, delta in usage.items()}
+        )
+        await MediaService.record_changes(
+            session, media.user_id, version, [media.id], MediaChange.Op.DELETED
+        )
         await session.commit()
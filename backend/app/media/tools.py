@@ -0,0 +1,44 @@
+import os
+import resource
+import subprocess
+
+from app.core.settings import settings
+
+
+class ToolError(Exception):
+    """An external media tool such as ffmpeg failed."""
+
+
+def limit_resources(pid: int) -> None:
+    """Lower a tool's priority and cap its CPU time.
+
+    Applied after spawning rather than with `preexec_fn`, which is unsafe in
+    processes with threads such as boto3 transfers or a threadpool.
+    """
+    limit = settings.transcode_cpu_seconds
+    try:
+        os.setpriority(os.PRIO_PROCESS, pid, 10)
+        resource.prlimit(pid, resource.RLIMIT_CPU, (limit, limit))
+    except ProcessLookupError:
+        pass  # Already exited
+
+
+def spawn(args: list[str], **kwargs) -> subprocess.Popen:
+    """Start a tool with resource limits."""
+    process = subprocess.Popen(args, stdin=subprocess.DEVNULL, **kwargs)
+    limit_resources(process.pid)
+    return process
+
+
+def run_tool(args: list[str]) -> bytes:
+    """Run a tool with resource limits and return its stdout."""
+    process = spawn(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        stdout, stderr = process.communicate(timeout=settings.transcode_timeout_seconds)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.communicate()
+        raise ToolError(f"{args[0]} timed out")
+    if process.returncode != 0:
+        raise ToolError(stderr.decode(errors="replace")[-2000:])
+    return stdout
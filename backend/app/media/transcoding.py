@@ -0,0 +1,224 @@
+import json
+import os
+import subprocess
+import tempfile
+import time
+
+from app.core.aws.s3 import s3_service
+from app.core.settings import settings
+from .constants import HLS_AUDIO_KBPS, HLS_RENDITIONS
+from .placeholders import try_compute_blurhash
+from .tools import ToolError, run_tool, spawn
+
+# Poll interval while waiting for ffmpeg to finish HLS segments
+SEGMENT_POLL_SECONDS = 0.5
+
+
+def probe(source: str) -> tuple[int, int, float]:
+    """Width, height and duration of a video's first video stream."""
+    output = run_tool(
+        [
+            settings.ffprobe_path,
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "stream=width,height:format=duration",
+            "-of",
+            "json",
+            source,
+        ]
+    )
+    info = json.loads(output)
+    if not info.get("streams"):
+        raise ToolError("No video stream")
+    stream = info["streams"][0]
+    duration = float(info.get("format", {}).get("duration") or 0)
+    return stream["width"], stream["height"], duration
+
+
+def extract_poster(source: str, duration: float) -> bytes:
+    """JPEG of a frame about a second in, past fade-ins."""
+    return run_tool(
+        [
+            settings.ffmpeg_path,
+            "-nostdin",
+            "-v",
+            "error",
+            "-ss",
+            f"{min(1.0, duration / 2):.3f}",
+            "-i",
+            source,
+            "-frames:v",
+            "1",
+            "-vf",
+            "scale='min(1280,iw)':-2",
+            "-q:v",
+            "3",
+            "-f",
+            "image2",
+            "-c:v",
+            "mjpeg",
+            "pipe:1",
+        ]
+    )
+
+
+def _rendition_args(source: str, workdir: str, height: int, kbps: int) -> list[str]:
+    segment = settings.hls_segment_seconds
+    # Scale the short side, so portrait videos get the same ladder
+    scale = f"scale='if(gt(iw,ih),-2,{height})':'if(gt(iw,ih),{height},-2)'"
+    return [
+        settings.ffmpeg_path,
+        "-nostdin",
+        "-v",
+        "error",
+        "-threads",
+        str(settings.transcode_threads),
+        "-i",
+        source,
+        "-map",
+        "0:v:0",
+        "-map",
+        "0:a:0?",
+        "-vf",
+        scale,
+        "-c:v",
+        "libx264",
+        "-preset",
+        "veryfast",
+        "-profile:v",
+        "main",
+        "-b:v",
+        f"{kbps}k",
+        "-maxrate",
+        f"{kbps * 107 // 100}k",
+        "-bufsize",
+        f"{kbps * 3 // 2}k",
+        # Keyframes on segment boundaries keep renditions switchable
+        "-force_key_frames",
+        f"expr:gte(t,n_forced*{segment})",
+        "-c:a",
+        "aac",
+        "-b:a",
+        f"{HLS_AUDIO_KBPS}k",
+        "-ac",
+        "2",
+        "-f",
+        "hls",
+        "-hls_time",
+        str(segment),
+        "-hls_playlist_type",
+        "vod",
+        # Segments are written as .tmp and renamed once complete
+        "-hls_flags",
+        "temp_file+independent_segments",
+        "-hls_segment_filename",
+        os.path.join(workdir, "%05d.ts"),
+        os.path.join(workdir, "index.m3u8"),
+    ]
+
+
+def _upload_segments(workdir: str, prefix: str) -> None:
+    for name in sorted(os.listdir(workdir)):
+        if name.endswith(".ts"):
+            path = os.path.join(workdir, name)
+            s3_service.upload_file(path, f"{prefix}/{name}", "video/mp2t")
+            os.unlink(path)
+
+
+def transcode_rendition(
+    source: str, hls_prefix: str, name: str, height: int, kbps: int
+) -> None:
+    """Encode one rendition, uploading each segment as soon as it is complete.
+
+    Only segments not yet uploaded are on disk at any time.
+    """
+    with tempfile.TemporaryDirectory(prefix="hls-") as workdir:
+        with open(os.path.join(workdir, "ffmpeg.log"), "w+b") as log:
+            process = spawn(
+                _rendition_args(source, workdir, height, kbps),
+                stdout=subprocess.DEVNULL,
+                stderr=log,
+            )
+            deadline = time.monotonic() + settings.transcode_timeout_seconds
+            try:
+                while True:
+                    finished = process.poll() is not None
+                    _upload_segments(workdir, f"{hls_prefix}/{name}")
+                    if finished:
+                        break
+                    if time.monotonic() > deadline:
+                        raise ToolError("ffmpeg timed out")
+                    time.sleep(SEGMENT_POLL_SECONDS)
+            finally:
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+
+            if process.returncode != 0:
+                log.seek(0)
+                raise ToolError(log.read().decode(errors="replace")[-2000:])
+
+        with open(os.path.join(workdir, "index.m3u8")) as f:
+            # Segment URIs are relative to the master playlist's directory
+            playlist = "".join(
+                line if line.startswith("#") or not line.strip() else f"{name}/{line}"
+                for line in f
+            )
+    s3_service.put_object(
+        f"{hls_prefix}/{name}.m3u8",
+        playlist.encode(),
+        "application/vnd.apple.mpegurl",
+    )
+
+
+def transcode_video(s3_key: str, mime_type: str) -> dict[str, str | None]:
+    """Produce a poster frame and HLS renditions under the derived prefix.
+
+    Runs in a processing worker process; returns the Media fields to set.
+    """
+    source = s3_service.create_presigned_download_url(s3_key)
+    width, height, duration = probe(source)
+    prefix = s3_service.derived_prefix(s3_key)
+
+    poster_key = f"{prefix}/poster.jpg"
+    poster = extract_poster(source, duration)
+    s3_service.put_object(poster_key, poster, "image/jpeg")
+    with tempfile.NamedTemporaryFile(suffix=".jpg") as f:
+        f.write(poster)
+        f.flush()
+        blurhash = try_compute_blurhash(f.name)
+
+    short_side = min(width, height)
+    renditions = [r for r in HLS_RENDITIONS if r[1] <= short_side]
+    renditions = renditions or [HLS_RENDITIONS[-1]]
+
+    hls_prefix = f"{prefix}/hls"
+    master = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-INDEPENDENT-SEGMENTS"]
+    for name, size, kbps in renditions:
+        transcode_rendition(source, hls_prefix, name, size, kbps)
+
+        long_side = round(size * max(width, height) / short_side / 2) * 2
+        if width >= height:
+            resolution = f"{long_side}x{size}"
+        else:
+            resolution = f"{size}x{long_side}"
+        bandwidth = (kbps + HLS_AUDIO_KBPS) * 1000
+        master.append(
+            f"#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION={resolution}"
+        )
+        master.append(f"{name}.m3u8")
+
+    playlist_key = f"{hls_prefix}/master.m3u8"
+    s3_service.put_object(
+        playlist_key,
+        ("\n".join(master) + "\n").encode(),
+        "application/vnd.apple.mpegurl",
+    )
+    return {
+        "poster_key": poster_key,
+        "playlist_key": playlist_key,
+        "blurhash": blurhash,
+    }
@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from threading import Lock
+from typing import Literal, NamedTuple
+from uuid import UUID
+
+from botocore.exceptions import ClientError
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.aws.s3 import s3_service
+from app.core.metrics import registry
+from app.core.settings import settings
+from .constants import IMAGE_VARIANT_SIZES
+from .exceptions import (
+    InvalidImageVariant,
+    MediaNotFound,
+    MediaRestoring,
+    UnreadableImage,
+)
+from .models import Media
+from .tools import ToolError, run_tool
+
+logger = logging.getLogger(__name__)
+
+Fit = Literal["cover", "contain"]
+Format = Literal["jpeg", "webp", "png"]
+
+# Output suffix, content type and libvips save options per format
+FORMATS = {
+    "jpeg": ("jpg", "image/jpeg", "[Q=82,strip,optimize_coding]"),
+    "webp": ("webp", "image/webp", "[Q=80,strip]"),
+    "png": ("png", "image/png", "[strip]"),
+}
+
+# libvips needs a width; this one never constrains
+UNBOUNDED = 100_000
+
+variant_requests = registry.counter(
+    "image_variant_requests_total",
+    "Image variant requests by where they were served from.",
+    ["source"],
+)
+
+
+def quantize(size: int | None) -> int | None:
+    """Round a requested size up to the next step, so variants are shared."""
+    if size is None:
+        return None
+    for step in IMAGE_VARIANT_SIZES:
+        if size <= step:
+            return step
+    return IMAGE_VARIANT_SIZES[-1]
+
+
+class Variant(NamedTuple):
+    """A resized rendition of a media item's image."""
+
+    media_id: UUID
+    source_key: str
+    key: str
+    width: int | None
+    height: int | None
+    fit: Fit
+    format: Format
+
+    @property
+    def content_type(self) -> str:
+        return FORMATS[self.format][1]
+
+
+class VariantLRU:
+    """In-memory LRU of rendered variants, bounded by total size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._items[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+
+def render(variant: Variant) -> bytes:
+    """Resize the source image with libvips, never upscaling."""
+    suffix, _, options = FORMATS[variant.format]
+    with tempfile.TemporaryDirectory(prefix="variant-") as workdir:
+        extension = os.path.splitext(variant.source_key)[1]
+        source = os.path.join(workdir, f"source{extension}")
+        target = os.path.join(workdir, f"variant.{suffix}")
+        s3_service.download_file(variant.source_key, source)
+
+        args = [
+            settings.vips_path,
+            "thumbnail",
+            source,
+            target + options,
+            str(variant.width or UNBOUNDED),
+            "--size",
+            "down",
+        ]
+        if variant.height:
+            args += ["--height", str(variant.height)]
+        if variant.fit == "cover" and variant.width and variant.height:
+            args += ["--crop", "centre"]
+        run_tool(args)
+
+        with open(target, "rb") as f:
+            return f.read()
+
+
+class ImageVariantService:
+    """Serves resized images from memory, then S3, rendering on a miss.
+
+    Concurrent requests for the same variant share a single load, and at
+    most `image_variant_concurrency` renders run at once per process.
+    """
+
+    def __init__(self):
+        self.cache = VariantLRU(settings.image_variant_cache_mb * 1024 * 1024)
+        self._loads: dict[str, asyncio.Task[bytes]] = {}
+        self._render_slots = asyncio.Semaphore(settings.image_variant_concurrency)
+
+    def variant(
+        self,
+        media: Media,
+        width: int | None,
+        height: int | None,
+        fit: Fit = "contain",
+        format: Format = "jpeg",
+    ) -> Variant:
+        """Describe the variant to serve, with quantized dimensions."""
+        if width is None and height is None:
+            raise InvalidImageVariant("Either width or height is required")
+
+        if media.media_type == Media.Type.IMAGE:
+            # Browsers can't decode HEIC, but libvips can; prefer the JPEG
+            source_key = media.web_key or media.s3_key
+        elif media.poster_key is not None:
+            source_key = media.poster_key
+        else:
+            raise MediaNotFound(media.id)
+
+        width, height = quantize(width), quantize(height)
+        suffix = FORMATS[format][0]
+        key = (
+            f"{s3_service.derived_prefix(media.s3_key)}/variants/"
+            f"{width or 0}x{height or 0}-{fit}.{suffix}"
+        )
+        return Variant(media.id, source_key, key, width, height, fit, format)
+
+    async def load(self, variant: Variant) -> bytes:
+        data = self.cache.get(variant.key)
+        if data is not None:
+            variant_requests.inc(source="memory")
+            return data
+
+        task = self._loads.get(variant.key)
+        if task is None:
+            task = asyncio.create_task(self._load(variant))
+            self._loads[variant.key] = task
+            task.add_done_callback(lambda _: self._loads.pop(variant.key, None))
+        else:
+            variant_requests.inc(source="coalesced")
+        # Shielded so a disconnecting client doesn't cancel the shared load
+        return await asyncio.shield(task)
+
+    async def _load(self, variant: Variant) -> bytes:
+        data = await run_in_threadpool(s3_service.get_object, variant.key)
+        if data is not None:
+            variant_requests.inc(source="s3")
+        else:
+            async with self._render_slots:
+                try:
+                    data = await run_in_threadpool(render, variant)
+                except ToolError as e:
+                    logger.warning("Rendering %s failed: %s", variant.key, e)
+                    raise UnreadableImage(variant.media_id) from e
+                except ClientError as e:
+                    code = e.response["Error"]["Code"]
+                    if code in ("404", "NoSuchKey"):
+                        raise MediaNotFound(variant.media_id) from e
+                    # A size not rendered before the original was archived
+                    if code != "InvalidObjectState":
+                        raise
+                    await run_in_threadpool(
+                        s3_service.restore_object,
+                        variant.source_key,
+                        settings.restore_days,
+                        settings.restore_tier,
+                    )
+                    raise MediaRestoring(settings.restore_retry_after_seconds)
+            variant_requests.inc(source="render")
+            try:
+                await run_in_threadpool(
+                    s3_service.put_object, variant.key, data, variant.content_type
+                )
+            except ClientError:
+                pass  # Serve it anyway, the next miss renders again
+
+        self.cache.put(variant.key, data)
+        return data
+
+
+image_variants = ImageVariantService()
@@ -0,0 +1,58 @@
+"""Benchmark JWT authentication overhead per request.
+
+Usage: uv run python -m benchmarks.auth_overhead [--requests N]
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from fastapi_users.authentication import JWTStrategy
+
+from app.auth.strategy import CachedJWTStrategy
+
+SECRET = "benchmark-secret"
+
+
+class StubUserManager:
+    """Resolves any id instantly so only token handling is measured."""
+
+    def parse_id(self, value: str) -> uuid.UUID:
+        return uuid.UUID(value)
+
+    async def get(self, user_id: uuid.UUID) -> uuid.UUID:
+        return user_id
+
+
+class StubUser:
+    def __init__(self):
+        self.id = uuid.uuid4()
+
+
+async def measure(strategy: JWTStrategy, token: str, requests: int) -> float:
+    user_manager = StubUserManager()
+    start = time.perf_counter()
+    for _ in range(requests):
+        await strategy.read_token(token, user_manager)
+    return (time.perf_counter() - start) / requests
+
+
+async def main(requests: int) -> None:
+    plain = JWTStrategy(secret=SECRET, lifetime_seconds=3600)
+    cached = CachedJWTStrategy(secret=SECRET, lifetime_seconds=3600)
+    token = await plain.write_token(StubUser())
+
+    plain_us = await measure(plain, token, requests) * 1e6
+    cached_us = await measure(cached, token, requests) * 1e6
+
+    print(f"JWTStrategy:       {plain_us:8.2f} us/request")
+    print(f"CachedJWTStrategy: {cached_us:8.2f} us/request")
+    print(f"Speedup:           {plain_us / cached_us:8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=10_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
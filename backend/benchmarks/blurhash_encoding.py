@@ -0,0 +1,43 @@
+"""Benchmark blurhash encoding of a downscaled image sample.
+
+Usage: uv run python -m benchmarks.blurhash_encoding [--images N]
+
+Decoding and downscaling happen in libvips and are not measured here.
+"""
+
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("GOOGLE_CLIENT_ID", "benchmark")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "benchmark")
+
+from app.media import placeholders  # noqa: E402
+
+# A worker should keep up with thousands of images per minute per process
+BUDGET_MS = 10
+
+
+def measure(images: int, width: int, height: int) -> float:
+    samples = [random.randbytes(width * height * 3) for _ in range(min(images, 100))]
+    start = time.perf_counter()
+    for i in range(images):
+        placeholders.encode_blurhash(width, height, 3, samples[i % len(samples)])
+    return (time.perf_counter() - start) / images * 1000
+
+
+def main(images: int) -> None:
+    width, height = placeholders.SAMPLE_SIZE, placeholders.SAMPLE_SIZE * 3 // 4
+    per_image_ms = measure(images, width, height)
+    print(f"Encoding: {per_image_ms:.3f} ms/image")
+
+    if per_image_ms > BUDGET_MS:
+        raise SystemExit(f"Over the {BUDGET_MS} ms budget")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.images)
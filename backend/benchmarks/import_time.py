@@ -0,0 +1,109 @@
+"""Measure import time of the API and time to first request, with budgets.
+
+Usage: uv run python -m benchmarks.import_time [--budget-ms N] [--serve]
+
+Imports `app.main` in a fresh interpreter under `python -X importtime` and
+fails if it exceeds the budget or pulls in a module that should only be
+imported on first use. With --serve, also starts uvicorn and times how long
+it takes until /health answers.
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+# Heavy modules that must stay out of the import path of app.main
+DEFERRED_MODULES = ("boto3",)
+
+ENV = {
+    **os.environ,
+    "GOOGLE_CLIENT_ID": os.environ.get("GOOGLE_CLIENT_ID", "benchmark"),
+    "GOOGLE_CLIENT_SECRET": os.environ.get("GOOGLE_CLIENT_SECRET", "benchmark"),
+}
+
+
+def import_times(module: str) -> list[tuple[str, int, int]]:
+    """(module, self us, cumulative us) for each import made by `module`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=ENV,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_request(timeout: float = 30.0) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        env=ENV,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                time.sleep(0.01)
+        raise SystemExit(f"No response from /health within {timeout:.0f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(budget_ms: float, top: int, serve: bool) -> None:
+    rows = import_times("app.main")
+    total_ms = next(cum for name, _, cum in rows if name == "app.main") / 1000
+
+    # Attribute time to top-level packages
+    packages: dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        packages[name.lstrip().split(".")[0]] += self_us
+
+    print(f"import app.main: {total_ms:.0f} ms ({len(rows)} modules)")
+    for package, self_us in sorted(packages.items(), key=lambda p: -p[1])[:top]:
+        print(f"  {package:<24} {self_us / 1000:>7.1f} ms")
+
+    if serve:
+        print(f"Time to first request: {time_to_first_request() * 1000:.0f} ms")
+
+    imported = {name for name, _, _ in rows}
+    eager = [module for module in DEFERRED_MODULES if module in imported]
+    if eager:
+        raise SystemExit(f"Imported at startup but should be deferred: {eager}")
+    if total_ms > budget_ms:
+        raise SystemExit(f"Over the {budget_ms:.0f} ms import budget")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--serve", action="store_true")
+    args = parser.parse_args()
+    main(args.budget_ms, args.top, args.serve)
@@ -0,0 +1,55 @@
+"""Measure per-request overhead of MetricsMiddleware.
+
+Usage: uv run python -m benchmarks.instrumentation_overhead [--requests N]
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.instrumentation import MetricsMiddleware
+
+
+def build_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"id": item_id}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def measure(app: FastAPI, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    client = httpx.AsyncClient(transport=transport, base_url="http://bench")
+    async with client:
+        # Warm up routing and pydantic caches
+        for i in range(100):
+            await client.get(f"/items/{i}")
+
+        start = time.perf_counter()
+        for i in range(requests):
+            await client.get(f"/items/{i}")
+        return (time.perf_counter() - start) / requests
+
+
+async def main(requests: int) -> None:
+    baseline = await measure(build_app(instrumented=False), requests)
+    instrumented = await measure(build_app(instrumented=True), requests)
+
+    print(f"Without middleware: {baseline * 1e6:8.1f} us/request")
+    print(f"With middleware:    {instrumented * 1e6:8.1f} us/request")
+    print(f"Overhead:           {(instrumented - baseline) * 1e6:8.1f} us/request")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,85 @@
+"""Simulate how upload requests spread over S3 key prefixes.
+
+Usage: uv run python -m benchmarks.key_distribution [--users N] [--batch-size N]
+
+Every user uploads a burst of batches at once, with a few heavy users, as
+after a trip. Keys are generated by `S3Service.generate_upload_key` under each
+key scheme. S3 serves about 3,500 PUTs per second per prefix and splits hot
+prefixes only after sustained load, so the hottest prefix bounds the burst.
+"""
+
+import argparse
+import os
+import random
+import uuid
+from collections import Counter
+
+os.environ.setdefault("GOOGLE_CLIENT_ID", "benchmark")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "benchmark")
+
+from app.core.aws.s3 import s3_service  # noqa: E402
+from app.core.settings import settings  # noqa: E402
+
+PUTS_PER_PREFIX_SECOND = 3500
+
+# The hottest shard may take at most this multiple of the mean
+MAX_SHARD_SKEW = 1.5
+
+
+def simulate(scheme: str, batches: list[int], batch_size: int) -> list[str]:
+    settings.s3_key_scheme = scheme
+    keys = []
+    for user_batches in batches:
+        user_id = uuid.uuid4()
+        for _ in range(user_batches * batch_size):
+            keys.append(s3_service.generate_upload_key(user_id, "photo.jpg"))
+    return keys
+
+
+def report(name: str, prefixes: Counter[str]) -> float:
+    hottest = max(prefixes.values())
+    mean = prefixes.total() / len(prefixes)
+    print(
+        f"  {name:<10} {len(prefixes):>7} prefixes, hottest {hottest:>6} PUTs "
+        f"({hottest / mean:.2f}x mean, "
+        f"{hottest / PUTS_PER_PREFIX_SECOND:.2f} s at the per-prefix limit)"
+    )
+    return hottest / mean
+
+
+def collision_odds(keys_per_prefix: int, bits: int) -> float:
+    """Birthday bound on any two random IDs colliding under one prefix."""
+    return keys_per_prefix**2 / 2 ** (bits + 1)
+
+
+def main(users: int, batch_size: int) -> None:
+    # Pareto-distributed batches per user: most upload one, a few upload many
+    batches = [min(50, int(random.paretovariate(1.2))) for _ in range(users)]
+    print(f"{users} users, {sum(batches) * batch_size} uploads in one burst")
+
+    skew = 0.0
+    for scheme in ("dated", "sharded"):
+        keys = simulate(scheme, batches, batch_size)
+        print(f"{scheme}:")
+        top_level = Counter(key.split("/", 2)[1] for key in keys)
+        directories = Counter(key.rsplit("/", 1)[0] for key in keys)
+        skew = report("top-level", top_level)
+        report("directory", directories)
+
+    hottest_user = max(batches) * batch_size
+    print(
+        f"Collision odds for the heaviest user's day: "
+        f"8 hex IDs {collision_odds(hottest_user, 32):.1e}, "
+        f"full UUID4 IDs {collision_odds(hottest_user, 122):.1e}"
+    )
+
+    if skew > MAX_SHARD_SKEW:
+        raise SystemExit(f"Sharded keys over {MAX_SHARD_SKEW}x the mean per shard")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+    main(args.users, args.batch_size)
@@ -0,0 +1,292 @@
+"""Drive the media API at fixed concurrency and report latency percentiles.
+
+Seed the database first (see benchmarks.seed), start the API against
+LocalStack, then run:
+    uv run python -m benchmarks.load_test --base-url http://localhost:8000
+
+Presigning is local, so LocalStack only has to be reachable for the API to
+start; confirm_uploads registers keys without touching S3. Raise
+RATE_LIMIT_UPLOAD_URLS_BURST and RATE_LIMIT_UPLOAD_URLS_PER_MINUTE on the API
+or the upload_urls scenario measures 429s, and set STORAGE_QUOTA_MB=0: seeded
+users start near or over the default quota, so upload_urls and
+confirm_uploads would measure 403s. The run fails if any request did.
+
+Results are written to benchmarks/results/<timestamp>-<commit>.json; pass
+--baseline with an earlier file to print the change per scenario.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+import asyncpg
+import httpx
+
+from app.auth.services import jwt_strategy
+from benchmarks.seed import BENCH_EMAIL_PATTERN, database_dsn
+
+RESULTS_DIR = Path(__file__).parent / "results"
+MEDIA_PREFIX = "/api/v1/media"
+# Media ids sampled per user for download_url
+MEDIA_PER_USER = 20
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Workload:
+    """Benchmark users, their tokens and a sample of their media."""
+
+    def __init__(self, tokens: dict[uuid.UUID, str], media: dict, batch_size: int):
+        self.tokens = tokens
+        self.media: dict[uuid.UUID, list[uuid.UUID]] = media
+        self.user_ids = list(tokens)
+        self.batch_size = batch_size
+
+    def pick_user(self) -> tuple[uuid.UUID, dict[str, str]]:
+        user_id = random.choice(self.user_ids)
+        return user_id, {"Authorization": f"Bearer {self.tokens[user_id]}"}
+
+
+async def load_workload(batch_size: int) -> tuple[Workload, int]:
+    conn = await asyncpg.connect(database_dsn())
+    try:
+        user_ids = [
+            row["id"]
+            for row in await conn.fetch(
+                'SELECT id FROM "user" WHERE email LIKE $1', BENCH_EMAIL_PATTERN
+            )
+        ]
+        rows = await conn.fetch(
+            """
+            SELECT user_id, id FROM (
+                SELECT user_id, id, row_number() OVER (
+                    PARTITION BY user_id ORDER BY created_at DESC
+                ) AS n
+                FROM media WHERE user_id = ANY($1::uuid[])
+            ) sampled
+            WHERE n <= $2
+            """,
+            user_ids,
+            MEDIA_PER_USER,
+        )
+        media_count = await conn.fetchval(
+            "SELECT count(*) FROM media WHERE user_id = ANY($1::uuid[])", user_ids
+        )
+    finally:
+        await conn.close()
+
+    if not user_ids:
+        raise SystemExit("No benchmark users, run benchmarks.seed first")
+
+    media: dict[uuid.UUID, list[uuid.UUID]] = {user_id: [] for user_id in user_ids}
+    for row in rows:
+        media[row["user_id"]].append(row["id"])
+    tokens = {
+        user_id: await jwt_strategy.write_token(SimpleNamespace(id=user_id))
+        for user_id in user_ids
+    }
+    return Workload(tokens, media, batch_size), media_count
+
+
+async def list_media(client: httpx.AsyncClient, workload: Workload) -> int:
+    _, headers = workload.pick_user()
+    params = {"page": random.randint(1, 5), "size": 50}
+    res = await client.get(MEDIA_PREFIX, params=params, headers=headers)
+    return res.status_code
+
+
+async def upload_urls(client: httpx.AsyncClient, workload: Workload) -> int:
+    _, headers = workload.pick_user()
+    files = [
+        {
+            "filename": f"IMG_{i:04d}.jpg",
+            "content_type": "image/jpeg",
+            "file_size": 4 << 20,
+        }
+        for i in range(workload.batch_size)
+    ]
+    res = await client.post(
+        f"{MEDIA_PREFIX}/upload/urls", json={"files": files}, headers=headers
+    )
+    return res.status_code
+
+
+async def confirm_uploads(client: httpx.AsyncClient, workload: Workload) -> int:
+    user_id, headers = workload.pick_user()
+    files = [
+        {
+            "key": f"media/{user_id}/bench/{uuid.uuid4().hex}.jpg",
+            "original_filename": f"IMG_{i:04d}.jpg",
+            "content_type": "image/jpeg",
+            "file_size": 4 << 20,
+        }
+        for i in range(workload.batch_size)
+    ]
+    res = await client.post(
+        f"{MEDIA_PREFIX}/upload/confirm", json={"files": files}, headers=headers
+    )
+    return res.status_code
+
+
+async def download_url(client: httpx.AsyncClient, workload: Workload) -> int:
+    user_id, headers = workload.pick_user()
+    media_ids = workload.media[user_id]
+    if not media_ids:
+        return 0
+    media_id = random.choice(media_ids)
+    res = await client.get(f"{MEDIA_PREFIX}/{media_id}/download-url", headers=headers)
+    return res.status_code
+
+
+SCENARIOS = {
+    "list_media": list_media,
+    "upload_urls": upload_urls,
+    "confirm_uploads": confirm_uploads,
+    "download_url": download_url,
+}
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    workload: Workload,
+    name: str,
+    concurrency: int,
+    duration: float,
+) -> dict:
+    request = SCENARIOS[name]
+    latencies: list[float] = []
+    statuses: Counter[int] = Counter()
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                status_code = await request(client, workload)
+            except httpx.HTTPError:
+                status_code = 0
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[status_code] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    ok = sum(count for code, count in statuses.items() if 200 <= code < 400)
+    return {
+        "requests": len(latencies),
+        "errors": len(latencies) - ok,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(max(latencies), 2),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_report(results: dict, baseline: dict | None) -> None:
+    print(
+        f"{results['media']:,} media, {results['users']} users, "
+        f"concurrency {results['concurrency']}, commit {results['commit']}"
+    )
+    for name, stats in results["scenarios"].items():
+        print(
+            f"  {name:<16} {stats['throughput_rps']:>8.1f} req/s"
+            f"  p50 {stats['p50_ms']:>8.1f} ms"
+            f"  p95 {stats['p95_ms']:>8.1f} ms"
+            f"  p99 {stats['p99_ms']:>8.1f} ms"
+            f"  errors {stats['errors']}"
+        )
+        before = (baseline or {}).get("scenarios", {}).get(name)
+        if before:
+            changes = [
+                f"{key.removesuffix('_ms')} {stats[key] / before[key] - 1:+.1%}"
+                for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+                if before[key]
+            ]
+            print(f"  {'':<16} vs {baseline['commit']}: {', '.join(changes)}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    workload, media_count = await load_workload(args.batch_size)
+    scenarios = args.scenario or list(SCENARIOS)
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=30
+    ) as client:
+        scenario_results = {}
+        for name in scenarios:
+            # Short warmup so connection setup and caches don't skew the run
+            await run_scenario(client, workload, name, args.concurrency, 2)
+            scenario_results[name] = await run_scenario(
+                client, workload, name, args.concurrency, args.duration
+            )
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "media": media_count,
+        "users": len(workload.user_ids),
+        "concurrency": args.concurrency,
+        "duration_seconds": args.duration,
+        "batch_size": args.batch_size,
+        "scenarios": scenario_results,
+    }
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    print_report(results, baseline)
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    path = RESULTS_DIR / f"{stamp}-{results['commit']}.json"
+    path.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"Results written to {path}")
+
+    failed = {
+        name: stats["statuses"]
+        for name, stats in scenario_results.items()
+        if stats["errors"]
+    }
+    if failed:
+        raise SystemExit(f"Requests failed, results are not comparable: {failed}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument(
+        "--scenario", action="append", choices=SCENARIOS, help="Repeatable"
+    )
+    parser.add_argument("--baseline", type=Path, help="Earlier results file")
+    asyncio.run(main(parser.parse_args()))
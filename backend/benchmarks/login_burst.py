@@ -0,0 +1,66 @@
+"""Measure latency of an unrelated endpoint while a login burst is running.
+
+Start the API first, then run:
+    uv run python -m benchmarks.login_burst --base-url http://localhost:8000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def login_burst(client: httpx.AsyncClient, logins: int, stop: asyncio.Event):
+    async def attempt(i: int) -> int:
+        res = await client.post(
+            "/api/v1/auth/jwt/login",
+            data={"username": f"burst-{i}@example.com", "password": "wrong-password"},
+        )
+        return res.status_code
+
+    statuses = await asyncio.gather(*(attempt(i) for i in range(logins)))
+    stop.set()
+    return statuses
+
+
+async def probe(client: httpx.AsyncClient, path: str, stop: asyncio.Event):
+    samples: list[float] = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get(path)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def main(base_url: str, logins: int, path: str) -> None:
+    limits = httpx.Limits(max_connections=logins + 10)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+        stop = asyncio.Event()
+        statuses, samples = await asyncio.gather(
+            login_burst(client, logins, stop), probe(client, path, stop)
+        )
+
+    rejected = sum(1 for s in statuses if s == 503)
+    print(f"Logins: {logins} ({rejected} rejected with 503)")
+    print(f"{path} during burst: {len(samples)} requests")
+    if samples:
+        print(f"  p50: {statistics.median(samples):.1f} ms")
+        print(f"  p99: {percentile(samples, 99):.1f} ms")
+        print(f"  max: {max(samples):.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--path", default="/health")
+    args = parser.parse_args()
+    asyncio.run(main(args.base_url, args.logins, args.path))
@@ -0,0 +1,94 @@
+"""Compare MediaList serialization throughput before and after the row fast path.
+
+Usage: uv run python -m benchmarks.media_list_serialization [--items 100]
+"""
+
+import argparse
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+os.environ.setdefault("GOOGLE_CLIENT_ID", "benchmark")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "benchmark")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.media.models import Media  # noqa: E402
+from app.media.schemas import MediaList, MediaRead  # noqa: E402
+
+
+def make_rows(count: int) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    user_id = uuid.uuid4()
+    return [
+        {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "media_type": Media.Type.IMAGE,
+            "status": Media.Status.COMPLETED,
+            "s3_key": f"media/{user_id}/2026/01/01/{i:08x}.jpg",
+            "s3_bucket": "atlasnap-media",
+            "original_filename": f"IMG_{i:04d}.jpg",
+            "file_size": 3_500_000,
+            "mime_type": "image/jpeg",
+            "user_tags": ["travel", "beach"],
+            "description": None,
+            "is_favorite": i % 7 == 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_path(objects: list[SimpleNamespace], adapter: TypeAdapter) -> bytes:
+    """Validate ORM objects, then FastAPI's response_model round trip."""
+    media_list = MediaList(
+        items=[MediaRead.model_validate(o) for o in objects],
+        total=len(objects),
+        page=1,
+        size=len(objects),
+        pages=1,
+    )
+    validated = adapter.validate_python(media_list, from_attributes=True)
+    content = jsonable_encoder(adapter.dump_python(validated, mode="json"))
+    return json.dumps(content, separators=(",", ":")).encode()
+
+
+def fast_path(rows: list[dict]) -> bytes:
+    return MediaList.from_rows(rows, len(rows), 1, len(rows)).to_json_bytes()
+
+
+def measure(func, *args, seconds: float) -> int:
+    iterations = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        func(*args)
+        iterations += 1
+    return iterations
+
+
+def main(items: int, seconds: float) -> None:
+    rows = make_rows(items)
+    objects = [SimpleNamespace(**row) for row in rows]
+    adapter = TypeAdapter(MediaList)
+
+    legacy = measure(legacy_path, objects, adapter, seconds=seconds) * items / seconds
+    fast = measure(fast_path, rows, seconds=seconds) * items / seconds
+
+    print(f"Page size: {items}")
+    print(f"Before: {legacy:12,.0f} items/s")
+    print(f"After:  {fast:12,.0f} items/s")
+    print(f"Speedup: {fast / legacy:11.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+    main(args.items, args.seconds)
@@ -0,0 +1,215 @@
+"""Compare list and insert latency of a flat and a hash-partitioned media table.
+
+Usage: uv run python -m benchmarks.media_partitioning [--rows N] [--users N]
+
+Builds both layouts side by side in a scratch schema, filled with the same
+synthetic rows, then runs the queries of `MediaService.list` and the batched
+insert of `MediaService.confirm_uploads` against each. The flat table has the
+indexes from before partitioning, the partitioned one the per-user composite
+indexes. 10M rows need a few GB of disk and several minutes to load.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+import uuid
+
+import asyncpg
+
+os.environ.setdefault("GOOGLE_CLIENT_ID", "benchmark")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "benchmark")
+
+from benchmarks.seed import database_dsn  # noqa: E402
+
+SCHEMA = "bench_partitioning"
+PARTITIONS = 16
+
+TABLES = {
+    "flat": ["CREATE TABLE {t} (LIKE public.media INCLUDING DEFAULTS)"],
+    "partitioned": [
+        "CREATE TABLE {t} (LIKE public.media INCLUDING DEFAULTS) "
+        "PARTITION BY HASH (user_id)",
+        *(
+            f"CREATE TABLE {{t}}_p{i:02d} PARTITION OF {{t}} "
+            f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {i})"
+            for i in range(PARTITIONS)
+        ),
+    ],
+}
+
+# Created after loading the rows, which is faster than maintaining them
+INDEXES = {
+    "flat": [
+        "ALTER TABLE {t} ADD PRIMARY KEY (id)",
+        "ALTER TABLE {t} ADD UNIQUE (s3_key)",
+        "CREATE INDEX ON {t} (user_id)",
+        "CREATE INDEX ON {t} (media_type)",
+        "CREATE INDEX ON {t} (status)",
+    ],
+    "partitioned": [
+        "ALTER TABLE {t} ADD PRIMARY KEY (id, user_id)",
+        "ALTER TABLE {t} ADD UNIQUE (user_id, s3_key)",
+        "CREATE INDEX ON {t} (user_id, created_at DESC)",
+        "CREATE INDEX ON {t} (user_id, media_type, created_at DESC)",
+        "CREATE INDEX ON {t} (user_id, status, created_at DESC)",
+        "CREATE INDEX ON {t} (user_id, is_favorite, created_at DESC)",
+    ],
+}
+
+# Unique constraint targeted by the confirm upsert
+CONFLICT_TARGETS = {"flat": "(s3_key)", "partitioned": "(user_id, s3_key)"}
+
+# Filters of MediaService.list, appended to the user ID condition
+LIST_FILTERS = {
+    "all": "",
+    "media_type": "AND media_type = 'VIDEO'",
+    "status": "AND status = 'FAILED'",
+    "is_favorite": "AND is_favorite",
+}
+
+# Deterministic user IDs, so both tables and the queries agree
+USER_ID = "md5('user' || ({expr}))::uuid"
+
+FILL = f"""
+    INSERT INTO {SCHEMA}.flat (
+        id, user_id, media_type, status, s3_key, s3_bucket, original_filename,
+        file_size, mime_type, is_favorite, created_at, updated_at
+    )
+    SELECT
+        gen_random_uuid(),
+        {USER_ID.format(expr="g % $2")},
+        CASE WHEN g % 10 = 0 THEN 'VIDEO' ELSE 'IMAGE' END::type,
+        CASE WHEN g % 100 = 0 THEN 'FAILED' ELSE 'COMPLETED' END::status,
+        'media/' || g,
+        'bench',
+        'IMG_' || g || '.jpg',
+        4194304,
+        'image/jpeg',
+        g % 20 = 0,
+        now() - g * interval '1 second',
+        now() - g * interval '1 second'
+    FROM generate_series(1, $1) AS g
+"""
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def build(conn: asyncpg.Connection, rows: int, users: int) -> None:
+    await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    await conn.execute(f"CREATE SCHEMA {SCHEMA}")
+    for layout in TABLES:
+        table = f"{SCHEMA}.{layout}"
+        start = time.perf_counter()
+        for statement in TABLES[layout]:
+            await conn.execute(statement.format(t=table))
+        if layout == "flat":
+            await conn.execute(FILL, rows, users)
+        else:
+            await conn.execute(f"INSERT INTO {table} SELECT * FROM {SCHEMA}.flat")
+        for statement in INDEXES[layout]:
+            await conn.execute(statement.format(t=table))
+        await conn.execute(f"ANALYZE {table}")
+        print(f"Built {layout} in {time.perf_counter() - start:.0f} s")
+
+
+async def measure_list(
+    conn: asyncpg.Connection, table: str, where: str, user_ids: list[uuid.UUID]
+) -> list[float]:
+    count = f"SELECT count(*) FROM {table} WHERE user_id = $1 {where}"
+    page = (
+        f"SELECT id, s3_key, created_at FROM {table} WHERE user_id = $1 {where} "
+        "ORDER BY created_at DESC OFFSET $2 LIMIT 20"
+    )
+    latencies = []
+    for user_id in user_ids:
+        start = time.perf_counter()
+        await conn.fetchval(count, user_id)
+        await conn.fetch(page, user_id, random.choice((0, 0, 0, 20, 100)))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def measure_insert(
+    conn: asyncpg.Connection, layout: str, user_ids: list[uuid.UUID], batch_size: int
+) -> list[float]:
+    table = f"{SCHEMA}.{layout}"
+    insert = f"""
+        INSERT INTO {table} (
+            id, user_id, media_type, status, s3_key, s3_bucket,
+            original_filename, file_size, mime_type, is_favorite
+        )
+        SELECT gen_random_uuid(), $1::uuid, 'IMAGE'::type, 'PENDING'::status, key,
+            'bench', 'IMG.jpg', 4194304, 'image/jpeg', false
+        FROM unnest($2::text[]) AS key
+        ON CONFLICT {CONFLICT_TARGETS[layout]} DO NOTHING
+        RETURNING id
+    """
+    latencies = []
+    for user_id in user_ids:
+        keys = [f"media/{user_id}/{uuid.uuid4().hex}.jpg" for _ in range(batch_size)]
+        start = time.perf_counter()
+        await conn.fetch(insert, user_id, keys)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(name: str, results: dict[str, list[float]]) -> None:
+    cells = "  ".join(
+        f"{layout} p50 {percentile(samples, 50):7.2f} "
+        f"p95 {percentile(samples, 95):7.2f}"
+        for layout, samples in results.items()
+    )
+    print(f"  {name:<12} {cells}  (ms)")
+
+
+async def main(args: argparse.Namespace) -> None:
+    conn = await asyncpg.connect(database_dsn())
+    try:
+        if not args.reuse:
+            await build(conn, args.rows, args.users)
+
+        rows = await conn.fetch(
+            f"SELECT {USER_ID.format(expr='k')} AS id "
+            "FROM generate_series(0, $1 - 1) AS k ORDER BY random() LIMIT $2",
+            args.users,
+            args.samples,
+        )
+        user_ids = [row["id"] for row in rows]
+
+        print(f"List, {args.samples} users, count and page per request:")
+        for name, where in LIST_FILTERS.items():
+            results = {}
+            for layout in TABLES:
+                table = f"{SCHEMA}.{layout}"
+                await measure_list(conn, table, where, user_ids[:10])  # Warm up
+                results[layout] = await measure_list(conn, table, where, user_ids)
+            report(name, results)
+
+        print(f"Insert, {args.batch_size} rows per batch:")
+        results = {}
+        for layout in TABLES:
+            results[layout] = await measure_insert(
+                conn, layout, user_ids, args.batch_size
+            )
+        report("confirm", results)
+
+        if not args.keep:
+            await conn.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--keep", action="store_true", help="Keep the tables")
+    parser.add_argument("--reuse", action="store_true", help="Use kept tables")
+    asyncio.run(main(parser.parse_args()))
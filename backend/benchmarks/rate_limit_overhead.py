@@ -0,0 +1,48 @@
+"""Benchmark per-request overhead of the in-memory rate limiter.
+
+Usage: uv run python -m benchmarks.rate_limit_overhead [--requests N] [--users N]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+os.environ.setdefault("GOOGLE_CLIENT_ID", "benchmark")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "benchmark")
+
+from app.core.rate_limit import (  # noqa: E402
+    InMemoryRateLimiter,
+    RateLimit,
+    RateLimitExceeded,
+)
+
+# Budget from the rate limiting requirements
+BUDGET_US = 100
+
+
+async def main(requests: int, users: int) -> None:
+    limiter = InMemoryRateLimiter()
+    limit = RateLimit("benchmark", capacity=10**9, per_minute=10**9)
+    keys = [str(uuid.uuid4()) for _ in range(users)]
+
+    start = time.perf_counter()
+    for i in range(requests):
+        try:
+            await limiter.hit(limit, keys[i % users], cost=20)
+        except RateLimitExceeded:
+            pass
+    per_request_us = (time.perf_counter() - start) / requests * 1e6
+
+    print(f"In-memory limiter: {per_request_us:.2f} us/request ({users} users)")
+    if per_request_us > BUDGET_US:
+        raise SystemExit(f"Over the {BUDGET_US} us budget")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.users))
@@ -0,0 +1,146 @@
+"""Seed Postgres with synthetic users and media for load tests.
+
+Usage: uv run python -m benchmarks.seed --scale 100k [--users 100]
+
+Existing benchmark users (bench-*@atlasnap.test) and their media are
+replaced. Rows are written with COPY, so 1M media takes well under a minute.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import asyncpg
+from fastapi_users.password import PasswordHelper
+
+from app.core.settings import settings
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+BENCH_EMAIL = "bench-{}@atlasnap.test"
+BENCH_EMAIL_PATTERN = "bench-%@atlasnap.test"
+BENCH_PASSWORD = "benchmark-password"
+
+MEDIA_COLUMNS = [
+    "id",
+    "user_id",
+    "media_type",
+    "status",
+    "s3_key",
+    "s3_bucket",
+    "original_filename",
+    "file_size",
+    "mime_type",
+    "is_favorite",
+    "created_at",
+    "updated_at",
+]
+
+
+def database_dsn() -> str:
+    return str(settings.database_url).replace("+asyncpg", "", 1)
+
+
+def media_records(user_ids: list[uuid.UUID], count: int, rng: random.Random):
+    now = datetime.now(timezone.utc)
+    for i in range(count):
+        user_id = user_ids[i % len(user_ids)]
+        is_video = rng.random() < 0.1
+        created_at = now - timedelta(seconds=rng.randint(0, 3 * 365 * 86400))
+        ext = "mp4" if is_video else "jpg"
+        size = rng.randint(30, 90) << 20 if is_video else rng.randint(2, 8) << 20
+        yield (
+            uuid.uuid4(),
+            user_id,
+            "VIDEO" if is_video else "IMAGE",
+            "COMPLETED",
+            f"media/{user_id}/{created_at:%Y/%m/%d}/{uuid.uuid4().hex}.{ext}",
+            settings.s3_bucket_name,
+            f"{'VID' if is_video else 'IMG'}_{i:07d}.{ext}",
+            size,
+            "video/mp4" if is_video else "image/jpeg",
+            rng.random() < 0.05,
+            created_at,
+            created_at,
+        )
+
+
+async def seed(media_count: int, users: int, batch_size: int, rng_seed: int) -> None:
+    rng = random.Random(rng_seed)
+    hashed_password = PasswordHelper().hash(BENCH_PASSWORD)
+    user_ids = [uuid.uuid4() for _ in range(users)]
+
+    conn = await asyncpg.connect(database_dsn())
+    try:
+        start = time.perf_counter()
+        async with conn.transaction():
+            # Media, ledgers and change logs cascade from the user rows
+            await conn.execute(
+                'DELETE FROM "user" WHERE email LIKE $1', BENCH_EMAIL_PATTERN
+            )
+            await conn.copy_records_to_table(
+                "user",
+                columns=[
+                    "id",
+                    "email",
+                    "hashed_password",
+                    "is_active",
+                    "is_superuser",
+                    "is_verified",
+                ],
+                records=[
+                    (user_id, BENCH_EMAIL.format(i), hashed_password, True, False, True)
+                    for i, user_id in enumerate(user_ids)
+                ],
+            )
+
+            records = media_records(user_ids, media_count, rng)
+            while batch := [r for _, r in zip(range(batch_size), records)]:
+                await conn.copy_records_to_table(
+                    "media", columns=MEDIA_COLUMNS, records=batch
+                )
+
+            await conn.execute(
+                """
+                INSERT INTO media_library (
+                    user_id, version, image_count, image_bytes, video_count,
+                    video_bytes
+                )
+                SELECT
+                    user_id,
+                    1,
+                    count(*) FILTER (WHERE media_type = 'IMAGE'),
+                    coalesce(sum(file_size) FILTER (WHERE media_type = 'IMAGE'), 0),
+                    count(*) FILTER (WHERE media_type = 'VIDEO'),
+                    coalesce(sum(file_size) FILTER (WHERE media_type = 'VIDEO'), 0)
+                FROM media WHERE user_id = ANY($1::uuid[])
+                GROUP BY user_id
+                """,
+                user_ids,
+            )
+            await conn.execute(
+                """
+                INSERT INTO media_change (user_id, media_id, seq, op)
+                SELECT user_id, id, 1, 'CREATED'
+                FROM media WHERE user_id = ANY($1::uuid[])
+                """,
+                user_ids,
+            )
+
+        await conn.execute("ANALYZE")
+        elapsed = time.perf_counter() - start
+        print(f"Seeded {users} users and {media_count:,} media in {elapsed:.1f}s")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", choices=SCALES, default="1k")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(seed(SCALES[args.scale], args.users, args.batch_size, args.seed))
@@ -0,0 +1,34 @@
+// CloudFront Function (viewer request, runtime 2.0) for CDN_SIGNING=cookie.
+//
+// Cookie-signed URLs are /{user_id}/{key}, so each user's signed cookie
+// covers only /{user_id}/*. This strips the user ID before the request goes
+// to the S3 origin, and rejects keys that don't belong to that user. Keep in
+// sync with app.media.delivery.origin_key.
+
+var UUID = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/;
+
+function isDotSegment(segment) {
+    try {
+        segment = decodeURIComponent(segment);
+    } catch (e) {
+        return true;
+    }
+    return segment === '.' || segment === '..';
+}
+
+function handler(event) {
+    var request = event.request;
+    var segments = request.uri.split('/'); // ['', user_id, root, ...]
+    var userId = segments[1];
+    var key = segments.slice(2);
+
+    // media/{user_id}/{date}/... or media/{shard}/{user_id}/...
+    var owner = [key[1], key[2]].filter(function (s) { return UUID.test(s); })[0];
+    if (segments.length < 5 || !UUID.test(userId) || owner !== userId
+        || key.some(isDotSegment)) {
+        return { statusCode: 403, statusDescription: 'Forbidden' };
+    }
+
+    request.uri = '/' + key.join('/');
+    return request;
+}
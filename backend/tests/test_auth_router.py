@@ -0,0 +1,188 @@
+"""SQL statement counts of the auth routes, checked against their budgets.
+
+Routes from fastapi-users have no @query_budget and get `sql_budget_default`.
+"""
+
+import pytest
+from fastapi_users.jwt import generate_jwt
+from fastapi_users.router.oauth import CSRF_TOKEN_COOKIE_NAME, generate_state_token
+from httpx_oauth.oauth2 import OAuth2Token
+
+from app.auth import router as auth_router
+from app.auth.services import (
+    SECRET,
+    UserManager,
+    google_oauth_client,
+    jwt_strategy,
+)
+from app.core.settings import settings
+from .conftest import PASSWORD, create_user
+
+PREFIX = "/api/v1/auth"
+
+
+async def test_login(client, user, query_budget):
+    with query_budget("POST", f"{PREFIX}/jwt/login"):
+        response = await client.post(
+            f"{PREFIX}/jwt/login", data={"username": user.email, "password": PASSWORD}
+        )
+    assert response.status_code == 200
+
+
+async def test_logout(auth_client, query_budget):
+    with query_budget("POST", f"{PREFIX}/jwt/logout"):
+        response = await auth_client.post(f"{PREFIX}/jwt/logout")
+    assert response.status_code == 204
+
+
+async def test_register(client, query_budget):
+    with query_budget("POST", f"{PREFIX}/register"):
+        response = await client.post(
+            f"{PREFIX}/register",
+            json={"email": "new@example.com", "password": PASSWORD},
+        )
+    assert response.status_code == 201
+
+
+async def test_forgot_password(client, user, query_budget):
+    with query_budget("POST", f"{PREFIX}/forgot-password"):
+        response = await client.post(
+            f"{PREFIX}/forgot-password", json={"email": user.email}
+        )
+    assert response.status_code == 202
+
+
+async def test_reset_password(client, user, query_budget):
+    manager = UserManager(None)
+    token = generate_jwt(
+        {
+            "sub": str(user.id),
+            "password_fgpt": manager.password_helper.hash(user.hashed_password),
+            "aud": manager.reset_password_token_audience,
+        },
+        SECRET,
+    )
+    with query_budget("POST", f"{PREFIX}/reset-password"):
+        response = await client.post(
+            f"{PREFIX}/reset-password",
+            json={"token": token, "password": "new-test-password"},
+        )
+    assert response.status_code == 200
+
+
+async def test_request_verify_token(client, query_budget):
+    unverified = await create_user("unverified@example.com", is_verified=False)
+    with query_budget("POST", f"{PREFIX}/request-verify-token"):
+        response = await client.post(
+            f"{PREFIX}/request-verify-token", json={"email": unverified.email}
+        )
+    assert response.status_code == 202
+
+
+async def test_verify(client, query_budget):
+    unverified = await create_user("unverified@example.com", is_verified=False)
+    token = generate_jwt(
+        {
+            "sub": str(unverified.id),
+            "email": unverified.email,
+            "aud": UserManager.verification_token_audience,
+        },
+        SECRET,
+    )
+    with query_budget("POST", f"{PREFIX}/verify"):
+        response = await client.post(f"{PREFIX}/verify", json={"token": token})
+    assert response.status_code == 200
+    assert response.json()["is_verified"] is True
+
+
+async def test_get_me(auth_client, query_budget):
+    with query_budget("GET", f"{PREFIX}/me"):
+        response = await auth_client.get(f"{PREFIX}/me")
+    assert response.status_code == 200
+
+
+async def test_update_me(auth_client, query_budget):
+    with query_budget("PATCH", f"{PREFIX}/me"):
+        response = await auth_client.patch(
+            f"{PREFIX}/me", json={"avatar_url": "https://example.com/a.png"}
+        )
+    assert response.status_code == 200
+
+
+@pytest.fixture
+async def admin_client(client):
+    """Client authenticated as a superuser."""
+    admin = await create_user("admin@example.com", is_superuser=True)
+    token = await jwt_strategy.write_token(admin)
+    client.headers["Authorization"] = f"Bearer {token}"
+    return client
+
+
+async def test_get_user(admin_client, user, query_budget):
+    with query_budget("GET", f"{PREFIX}/{{id}}"):
+        response = await admin_client.get(f"{PREFIX}/{user.id}")
+    assert response.status_code == 200
+
+
+async def test_update_user(admin_client, user, query_budget):
+    # Loads the superuser, the target user and the target again after the
+    # update: one statement for different rows, not an N+1
+    with query_budget("PATCH", f"{PREFIX}/{{id}}", allow_repeated=True):
+        response = await admin_client.patch(
+            f"{PREFIX}/{user.id}", json={"is_active": False}
+        )
+    assert response.status_code == 200
+
+
+async def test_delete_user(admin_client, user, query_budget):
+    with query_budget("DELETE", f"{PREFIX}/{{id}}"):
+        response = await admin_client.delete(f"{PREFIX}/{user.id}")
+    assert response.status_code == 204
+
+
+async def test_google_authorize(client, query_budget):
+    with query_budget("GET", f"{PREFIX}/google/authorize"):
+        response = await client.get(f"{PREFIX}/google/authorize")
+    assert response.status_code == 200
+
+
+def mock_google(monkeypatch, email: str) -> None:
+    async def get_access_token(code, redirect_uri, code_verifier=None):
+        return OAuth2Token({"access_token": "google-token", "expires_in": 3600})
+
+    async def get_id_email(token):
+        return "google-account-id", email
+
+    async def fetch_google_profile(token):
+        return {"picture": "https://example.com/avatar.png"}
+
+    monkeypatch.setattr(google_oauth_client, "get_access_token", get_access_token)
+    monkeypatch.setattr(google_oauth_client, "get_id_email", get_id_email)
+    monkeypatch.setattr(auth_router, "fetch_google_profile", fetch_google_profile)
+
+
+async def test_google_callback(client, monkeypatch, query_budget):
+    mock_google(monkeypatch, "google@example.com")
+    csrf_token = "csrf-token"
+    state = generate_state_token({"csrftoken": csrf_token}, SECRET)
+    client.cookies.set(CSRF_TOKEN_COOKIE_NAME, csrf_token)
+
+    with query_budget("GET", f"{PREFIX}/google/callback"):
+        response = await client.get(
+            f"{PREFIX}/google/callback", params={"code": "code", "state": state}
+        )
+    assert response.status_code == 200
+
+
+async def test_google_callback_redirect(client, user, monkeypatch, query_budget):
+    # Links the Google account to the existing user, the most expensive path
+    mock_google(monkeypatch, user.email)
+
+    with query_budget("GET", f"{PREFIX}/google/callback/redirect"):
+        response = await client.get(
+            f"{PREFIX}/google/callback/redirect", params={"code": "code"}
+        )
+    assert response.status_code == 302
+    assert response.headers["location"].startswith(
+        settings.google_frontend_redirect_url
+    )
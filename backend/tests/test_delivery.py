@@ -0,0 +1,74 @@
+"""Offline checks of the CloudFront signed cookies against a test key pair."""
+
+import uuid
+from urllib.parse import urlsplit
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from pydantic import ValidationError
+
+from app.core.aws.cloudfront import cloudfront_signer, verify_signed_cookies
+from app.core.aws.s3 import s3_service
+from app.core.settings import Settings, settings
+from app.media.delivery import CloudFrontDelivery, origin_key
+
+CDN = "https://media.example.com"
+
+
+@pytest.fixture
+def public_key(monkeypatch) -> bytes:
+    """Sign cookies with a fresh key pair, returns the public key PEM."""
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    monkeypatch.setattr(cloudfront_signer, "_key", private_key)
+    monkeypatch.setattr(settings, "cdn_base_url", CDN)
+    monkeypatch.setattr(settings, "cdn_signing", "cookie")
+    monkeypatch.setattr(settings, "cdn_key_pair_id", "K2TEST")
+    return private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+
+
+def test_cookie_covers_own_files(public_key):
+    delivery = CloudFrontDelivery()
+    user_id = uuid.uuid4()
+    key = s3_service.generate_upload_key(user_id, "IMG_0001.jpg")
+    cookies, _ = delivery.cookies(user_id)
+
+    url = delivery.download_url(key)
+    assert verify_signed_cookies(url, cookies, public_key)
+    assert origin_key(urlsplit(url).path) == key
+
+
+def test_cookie_rejects_other_users_files(public_key):
+    delivery = CloudFrontDelivery()
+    user_id, victim_id = uuid.uuid4(), uuid.uuid4()
+    victim_key = s3_service.generate_upload_key(victim_id, "IMG_0001.jpg")
+    cookies, _ = delivery.cookies(user_id)
+
+    # The victim's own URL, and the same file with the attacker's ID in a query
+    victim_url = delivery.download_url(victim_key)
+    assert not verify_signed_cookies(victim_url, cookies, public_key)
+    assert not verify_signed_cookies(
+        f"{CDN}/{victim_key}?x=/{user_id}/", cookies, public_key
+    )
+
+    # Under the attacker's own prefix the cookie matches, the origin refuses
+    path = f"/{user_id}/{victim_key}"
+    assert verify_signed_cookies(f"{CDN}{path}", cookies, public_key)
+    assert origin_key(path) is None
+    assert origin_key(f"/{user_id}/media/{user_id}/../{victim_key}") is None
+
+
+def test_cloudfront_requires_cdn_settings(tmp_path):
+    with pytest.raises(ValidationError) as info:
+        Settings(delivery_backend="cloudfront")
+    for name in ("CDN_BASE_URL", "CDN_KEY_PAIR_ID", "CDN_PRIVATE_KEY_PATH"):
+        assert name in str(info.value)
+
+    Settings(
+        delivery_backend="cloudfront",
+        cdn_base_url=CDN,
+        cdn_key_pair_id="K2TEST",
+        cdn_private_key_path=tmp_path / "private.pem",
+    )
@@ -0,0 +1,60 @@
+"""The status LISTEN connection and its settings."""
+
+import asyncio
+
+import asyncpg
+import pytest
+from pydantic import ValidationError
+
+from app.core.settings import Settings, settings
+from app.media.events import StatusEventBroker
+
+
+async def test_listen_retries_any_failure(monkeypatch, caplog):
+    attempts = 0
+
+    async def connect(dsn):
+        nonlocal attempts
+        attempts += 1
+        raise asyncpg.InterfaceError("connection was closed")
+
+    monkeypatch.setattr(asyncpg, "connect", connect)
+    monkeypatch.setattr(settings, "events_reconnect_seconds", 0)
+
+    listener = asyncio.create_task(StatusEventBroker()._listen())
+    await asyncio.sleep(0.05)
+    assert not listener.done()
+    listener.cancel()
+
+    assert attempts > 1
+    assert "Status LISTEN connection failed" in caplog.text
+
+
+async def test_listen_uses_listen_url(monkeypatch):
+    dsns = []
+
+    async def connect(dsn):
+        dsns.append(dsn)
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(asyncpg, "connect", connect)
+    monkeypatch.setattr(settings, "events_reconnect_seconds", 0)
+    monkeypatch.setattr(
+        settings, "database_listen_url", "postgresql+asyncpg://direct:5432/atlasnap"
+    )
+
+    listener = asyncio.create_task(StatusEventBroker()._listen())
+    await asyncio.sleep(0.01)
+    listener.cancel()
+
+    assert dsns[0] == "postgresql://direct:5432/atlasnap"
+
+
+def test_pgbouncer_mode_requires_listen_url():
+    with pytest.raises(ValidationError, match="DATABASE_LISTEN_URL"):
+        Settings(database_pgbouncer_mode=True)
+
+    Settings(
+        database_pgbouncer_mode=True,
+        database_listen_url="postgresql://postgres:postgres@db:5432/atlasnap",
+    )
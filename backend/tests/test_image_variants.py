@@ -0,0 +1,32 @@
+"""Errors of the image variant route when the source can't be rendered."""
+
+from botocore.exceptions import ClientError
+
+from app.core.aws.s3 import s3_service
+from app.media import variants
+from app.media.tools import ToolError
+
+PREFIX = "/api/v1/media"
+
+
+async def test_corrupt_source(auth_client, media, monkeypatch):
+    def run_tool(args):
+        raise ToolError("VipsJpeg: Premature end of JPEG file")
+
+    monkeypatch.setattr(s3_service, "get_object", lambda key: None)
+    monkeypatch.setattr(s3_service, "download_file", lambda key, path: None)
+    monkeypatch.setattr(variants, "run_tool", run_tool)
+
+    response = await auth_client.get(f"{PREFIX}/{media.id}/image?w=320")
+    assert response.status_code == 422
+
+
+async def test_missing_source(auth_client, media, monkeypatch):
+    def download_file(key, path):
+        raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+
+    monkeypatch.setattr(s3_service, "get_object", lambda key: None)
+    monkeypatch.setattr(s3_service, "download_file", download_file)
+
+    response = await auth_client.get(f"{PREFIX}/{media.id}/image?w=320")
+    assert response.status_code == 404
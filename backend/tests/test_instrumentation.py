@@ -0,0 +1,26 @@
+"""SQL timing of the metrics middleware."""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from app.core.database import engine
+from app.core.instrumentation import RequestStats, request_stats
+
+
+async def test_failed_statement_leaves_no_state():
+    stats = RequestStats()
+    token = request_stats.set(stats)
+    try:
+        async with engine.connect() as conn:
+            with pytest.raises(DBAPIError):
+                await conn.execute(text("SELECT 1 / 0"))
+            await conn.rollback()
+            await conn.execute(text("SELECT pg_sleep(0.01)"))
+            info = (await conn.get_raw_connection()).info
+    finally:
+        request_stats.reset(token)
+
+    assert "query_start" not in info
+    assert stats.queries == 1
+    assert 0.01 <= stats.query_seconds < 1
@@ -0,0 +1,137 @@
+"""SQL statement counts of the media routes, checked against @query_budget."""
+
+from app.core.aws.s3 import s3_service
+from app.core.database import async_session_maker
+from app.media.events import status_events
+from app.media.models import Media
+from app.media.variants import image_variants
+
+PREFIX = "/api/v1/media"
+
+
+async def test_get_upload_urls(auth_client, query_budget):
+    files = [
+        {"filename": f"IMG_{i}.jpg", "content_type": "image/jpeg", "file_size": 1024}
+        for i in range(20)
+    ]
+    with query_budget("POST", f"{PREFIX}/upload/urls"):
+        response = await auth_client.post(
+            f"{PREFIX}/upload/urls", json={"files": files}
+        )
+    assert response.status_code == 200
+    assert len(response.json()["uploads"]) == 20
+
+
+async def test_confirm_uploads(auth_client, user, query_budget):
+    files = [
+        {
+            "key": s3_service.generate_upload_key(user.id, f"IMG_{i}.jpg"),
+            "original_filename": f"IMG_{i}.jpg",
+            "content_type": "image/jpeg",
+            "file_size": 1024,
+        }
+        for i in range(20)
+    ]
+    with query_budget("POST", f"{PREFIX}/upload/confirm"):
+        response = await auth_client.post(
+            f"{PREFIX}/upload/confirm", json={"files": files}
+        )
+    assert response.status_code == 200
+    assert response.json()["created"] == 20
+
+
+async def test_get_download_url(auth_client, media, query_budget):
+    with query_budget("GET", f"{PREFIX}/{{media_id}}/download-url"):
+        response = await auth_client.get(f"{PREFIX}/{media.id}/download-url")
+    assert response.status_code == 200
+
+
+async def test_get_image_variant(auth_client, media, query_budget):
+    variant = image_variants.variant(media, 320, None)
+    image_variants.cache.put(variant.key, b"jpeg")
+    with query_budget("GET", f"{PREFIX}/{{media_id}}/image"):
+        response = await auth_client.get(f"{PREFIX}/{media.id}/image?w=320")
+    assert response.status_code == 200
+
+
+async def test_get_hls_playlist(auth_client, media, monkeypatch, query_budget):
+    async with async_session_maker() as session:
+        media = await session.merge(media)
+        media.media_type = Media.Type.VIDEO
+        media.playlist_key = (
+            f"{s3_service.derived_prefix(media.s3_key)}/hls/master.m3u8"
+        )
+        await session.commit()
+    monkeypatch.setattr(s3_service, "get_object", lambda key: b"#EXTM3U\n")
+
+    with query_budget("GET", f"{PREFIX}/{{media_id}}/hls/{{name}}.m3u8"):
+        response = await auth_client.get(f"{PREFIX}/{media.id}/hls/master.m3u8")
+    assert response.status_code == 200
+
+
+async def test_list_media(auth_client, media, query_budget):
+    with query_budget("GET", PREFIX):
+        response = await auth_client.get(PREFIX, params={"is_favorite": False})
+    assert response.status_code == 200
+    assert response.json()["total"] == 1
+
+
+async def test_list_media_changes(auth_client, user, query_budget):
+    # Create the media through the API, so they are in the change log
+    files = [
+        {
+            "key": s3_service.generate_upload_key(user.id, f"IMG_{i}.jpg"),
+            "original_filename": f"IMG_{i}.jpg",
+            "content_type": "image/jpeg",
+            "file_size": 1024,
+        }
+        for i in range(5)
+    ]
+    await auth_client.post(f"{PREFIX}/upload/confirm", json={"files": files})
+
+    with query_budget("GET", f"{PREFIX}/changes"):
+        response = await auth_client.get(f"{PREFIX}/changes")
+    assert response.status_code == 200
+    assert len(response.json()["changes"]) == 5
+
+
+async def test_stream_media_events(auth_client, monkeypatch, query_budget):
+    async def stream(subscription):
+        yield "retry: 5000\n\n"
+
+    monkeypatch.setattr(status_events, "stream", stream)
+
+    with query_budget("GET", f"{PREFIX}/events"):
+        response = await auth_client.get(f"{PREFIX}/events")
+    assert response.status_code == 200
+    assert status_events.count == 0
+
+
+async def test_get_media(auth_client, media, query_budget):
+    with query_budget("GET", f"{PREFIX}/{{media_id}}"):
+        response = await auth_client.get(f"{PREFIX}/{media.id}")
+    assert response.status_code == 200
+
+    with query_budget("GET", f"{PREFIX}/{{media_id}}"):
+        response = await auth_client.get(
+            f"{PREFIX}/{media.id}", headers={"If-None-Match": response.headers["ETag"]}
+        )
+    assert response.status_code == 304
+
+
+async def test_update_media(auth_client, media, query_budget):
+    with query_budget("PATCH", f"{PREFIX}/{{media_id}}"):
+        response = await auth_client.patch(
+            f"{PREFIX}/{media.id}", json={"is_favorite": True, "user_tags": ["beach"]}
+        )
+    assert response.status_code == 200
+    assert response.json()["is_favorite"] is True
+
+
+async def test_delete_media(auth_client, media, monkeypatch, query_budget):
+    monkeypatch.setattr(s3_service, "delete_object", lambda key: None)
+    monkeypatch.setattr(s3_service, "delete_prefix", lambda prefix: None)
+
+    with query_budget("DELETE", f"{PREFIX}/{{media_id}}"):
+        response = await auth_client.delete(f"{PREFIX}/{media.id}")
+    assert response.status_code == 204